@@ -1,6 +1,5 @@
 import sys
 import asyncio
-import csv
 import os
 from dotenv import load_dotenv
 
@@ -15,21 +14,40 @@ PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME")
 if sys.platform.startswith("darwin") and sys.version_info >= (3, 8):
     asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from services import bill
 from services.service_combination_service import ServiceCombinationService
+from services.lexical_search import load_lexical_index, reciprocal_rank_fusion
+from services.embedding_cache import get_embedding_cache, openai_embed_fn
+from services.clients import EMBEDDING_MODEL, close_clients, get_openai_client, get_vector_index, warm_up_clients
 from services.enhanced_rag_service import enhanced_rag_service
-import websockets
-import base64
+from services.chat_backend import stream_reply
+from services.prompt_builder import build_prompt
+from services.chat_sessions import create_session_id, get_session_store, new_session, record_turn
+from services.field_extraction import compose_reply, extract_fields, fast_path_stats, merge_fields
+from services.query_router import ROUTE_NONE, ROUTE_SEMANTIC, code_context, route_query, route_stats
+from services.blocking import CHAT_POOL, SEARCH_POOL, iterate_blocking, pool_stats, run_blocking, shutdown_pools
 from pydantic import BaseModel
-import openai
 import re
 import json
-from typing import List
-from pinecone import Pinecone
-from openai import OpenAI
-
-app = FastAPI(title="Medical Billing Assistant API")
+import time
+from typing import List, Optional
+from contextlib import asynccontextmanager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the server accepts traffic (and answers
+    # liveness checks) immediately; /ready reports when warm-up has finished
+    app.state.ready = False
+    app.state.warm_up = {}
+    warm_up_task = asyncio.create_task(warm_up(app))
+    yield
+    warm_up_task.cancel()
+    shutdown_pools(wait=False)
+    close_clients()
+
+app = FastAPI(title="Medical Billing Assistant API", lifespan=lifespan)
 
 # CORS handled by Nginx reverse proxy
 # app.add_middleware(
@@ -50,6 +68,8 @@ class ChatRequest(BaseModel):
     message: str
     context: dict = {}
     chat_history: list = []
+    # Server-side session from a previous response; with it only `message` is needed
+    session_id: Optional[str] = None
 
 class ServiceCombinationRequest(BaseModel):
     description: str
@@ -70,77 +90,72 @@ BILL_FIELDS = [
     "diagnosisCode", "serviceCode", "serviceName", "amount", "note", "billingType"
 ]
 
-openai.api_key = OPENAI_API_KEY
-
-services = []
-data_dir = os.path.join(os.path.dirname(__file__), "data")
-for filename in os.listdir(data_dir):
-    if filename.startswith("dataset_schedule_of_benefits") and filename.endswith(".csv"):
-        with open(os.path.join(data_dir, filename), encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get("Billing Code"):
-                    services.append({
-                        "code": row.get("Billing Code"),
-                        "description": row.get("Description"),
-                        "amount": row.get("Charge $")
-                    })
-
-ASSISTANT_ID = os.getenv("ASSISTANT_ID")
-
-def extract_fields_from_assistant(user_message, chat_history=None):
-    # Use RAG to get context
-    rag_result = enhanced_rag_service.process_query(user_message, chat_history=chat_history or [])
-    rag_context = ''
-    if isinstance(rag_result, dict):
-        rag_context = rag_result.get('context', '') or rag_result.get('answer', '') or ''
-    # Build system prompt with RAG context
-    system_prompt = f"""You are a helpful medical billing assistant. 
-
-If this is the user's first message (like "hi" or a greeting), respond warmly and ask how you can help with their billing needs.
-
-When the user describes medical services, use the context below to identify ALL mentioned services with their specific codes and fees. Search for each service separately (e.g., "general assessment" AND "chest x-ray").
-
-Be conversational and helpful - ask for one piece of information at a time if needed.
-
-When you have enough information, provide a JSON response with ALL services found from your knowledge base:
-{{
-  "patientName": "name",
-  "serviceDate": "YYYY-MM-DD",
-  "ohipNumber": "number",
-  "services": [
-    {{"serviceName": "service name from database", "serviceCode": "code from database", "unitPrice": actual_price_from_database}}
-  ]
-}}
-
-Context:
-{rag_context}"""
-    thread_messages = []
-    if chat_history:
-        for m in chat_history:
-            if m.get("role") in ("user", "assistant") and m.get("content"):
-                thread_messages.append({"role": m["role"], "content": m["content"]})
-    # Insert RAG context as the first user message
-    thread_messages.insert(0, {"role": "user", "content": system_prompt})
-    thread_messages.append({"role": "user", "content": user_message})
-    # Create a thread and run the assistant
-    thread = openai.beta.threads.create(messages=thread_messages)
-    run = openai.beta.threads.runs.create(thread_id=thread.id, assistant_id=ASSISTANT_ID)
-    import time
-    while True:
-        run_status = openai.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
-        if run_status.status == "completed":
-            break
-        elif run_status.status == "failed":
-            raise Exception("OpenAI Assistant run failed")
-        time.sleep(0.5)
-    messages = openai.beta.threads.messages.list(thread_id=thread.id)
-    answer = ""
-    for msg in messages.data:
-        if msg.role == "assistant":
-            answer = msg.content[0].text.value
-            break
-    import re, json
+def warm_up_vector_store():
+    if enhanced_rag_service.vector_store is None:
+        raise RuntimeError("vector store unavailable (see the Pinecone connection error in the log)")
+
+def warm_up_services():
+    """Load the fee schedule, BM25 index and vector store and open the API connections.
+
+    Returns seconds taken per step, or the error of a failed step (failures
+    are reported, not raised).
+    """
+    report = {}
+    steps = {
+        # Memory-mapped fee schedule snapshot (built by scripts/build_fee_schedule_snapshot.py)
+        "catalog": lambda: service_combination_service.catalog,
+        "lexical_index": load_lexical_index,
+        "vector_store": warm_up_vector_store,
+    }
+    for name, step in steps.items():
+        started = time.perf_counter()
+        try:
+            step()
+            report[name] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            print(f"Warm-up of {name} failed:", e)
+            report[name] = {"error": str(e)}
+    report.update(warm_up_clients())
+    return report
+
+async def warm_up(app: FastAPI):
+    started = time.perf_counter()
+    try:
+        app.state.warm_up = await run_blocking(SEARCH_POOL, warm_up_services)
+    except Exception as e:
+        # Requests still initialize what they need on first use
+        print("Warm-up failed:", e)
+        app.state.warm_up = {"error": str(e)}
+    app.state.warm_up["total"] = round(time.perf_counter() - started, 3)
+    app.state.ready = True
+
+def retrieve_context(user_message, chat_history=None, trace=None):
+    """Context for the prompt from the route the query router picks.
+
+    Greetings and field-only turns get none, literal billing codes are looked
+    up in the catalog and only free text reaches the vector search. The route
+    and retrieval time are recorded in `trace`.
+    """
+    started = time.perf_counter()
+    try:
+        route, services = route_query(user_message, service_combination_service.catalog)
+    except Exception as e:
+        print("Query routing failed:", e)
+        route, services = ROUTE_SEMANTIC, []
+    context = code_context(services)
+    if route == ROUTE_SEMANTIC:
+        rag_result = enhanced_rag_service.process_query(user_message, chat_history=chat_history or [])
+        rag_context = ''
+        if isinstance(rag_result, dict):
+            rag_context = rag_result.get('context', '') or rag_result.get('answer', '') or ''
+        context = "\n".join(part for part in (context, rag_context) if part)
+    route_stats.record(route)
+    if trace is not None:
+        trace.update(route=route, retrievalMs=round((time.perf_counter() - started) * 1000, 1))
+    return context
+
+def parse_bill_info(answer):
+    """Bill info from the JSON object in the assistant's reply, with serviceList/optimalService normalized"""
     match = re.search(r'({[\s\S]*})', answer)
     bill_info = {}
     service_list = []
@@ -174,12 +189,119 @@ Context:
                 bill_info["optimalService"] = highest  # Mark the best one
         except Exception as e:
             print("Error parsing assistant JSON:", e)
-    return answer, bill_info
-
-def process_user_message(user_message: str, chat_history: list):
+    return bill_info
+
+def stream_assistant_reply(user_message, chat_history=None, collected=None, trace=None, earlier=None):
+    """Reply text deltas for a chat turn (RAG prompt, then the CHAT_BACKEND call).
+
+    `collected` is the bill info gathered in earlier turns; it is carried in
+    the prompt as structured state while old history is trimmed to the
+    prompt's token budget. `earlier` are user messages the session already
+    trimmed off `chat_history`, summarized in the prompt.
+    """
+    system_prompt, history, _ = build_prompt(user_message, chat_history, collected,
+                                             retrieve_context(user_message, chat_history, trace),
+                                             earlier=earlier)
+    # CHAT_BACKEND picks the polled Assistants run or a single streamed call
+    yield from stream_reply(system_prompt, user_message, history)
+
+def extract_fields_from_assistant(user_message, chat_history=None, collected=None, trace=None, earlier=None):
+    answer = "".join(stream_assistant_reply(user_message, chat_history, collected, trace, earlier))
+    return answer, parse_bill_info(answer)
+
+def answer_locally(user_message: str, session: Optional[dict] = None, trace: Optional[dict] = None):
+    """(reply, bill_info) when the message only supplies fields the local extractor parses, else None.
+
+    Names, OHIP numbers, dates and known billing codes need no RAG lookup or
+    assistant run; the returned bill_info is merged with the session's.
+    """
+    try:
+        fields = extract_fields(user_message, service_combination_service.catalog)
+    except Exception as e:
+        print("Local field extraction failed:", e)
+        fields = None
+    fast_path_stats.record(fields is not None)
+    if fields is None:
+        return None
+    if trace is not None:
+        trace.update(route=ROUTE_NONE, answeredLocally=True)
+    bill_info = merge_fields(session["bill_info"] if session is not None else {}, fields)
+    reply = compose_reply(fields, bill_info)
+    if session is not None:
+        record_turn(session, user_message, reply, bill_info)
+    return reply, bill_info
+
+def process_user_message(user_message: str, chat_history: list, session: Optional[dict] = None,
+                         trace: Optional[dict] = None):
     """Run assistant, build summary, detect missing fields, and return tuple (reply, bill_info, missing_fields)."""
-    reply, bill_info = extract_fields_from_assistant(user_message, chat_history)
-
+    local = answer_locally(user_message, session, trace)
+    if local is not None:
+        return finalize_reply(*local)
+    collected = session["bill_info"] if session is not None else None
+    earlier = session.get("earlier") if session is not None else None
+    reply, bill_info = extract_fields_from_assistant(user_message, chat_history, collected, trace, earlier)
+    if session is not None:
+        # A conversational reply (or partial JSON) must not drop what earlier turns collected;
+        # a serviceList in its JSON is the whole bill and replaces the stored one
+        bill_info = merge_fields(session["bill_info"], bill_info, replace_services=True)
+        record_turn(session, user_message, reply, bill_info)
+    return finalize_reply(reply, bill_info)
+
+class UnknownSessionError(Exception):
+    pass
+
+def bill_info_from_history(chat_history: list) -> dict:
+    """Bill info a client-supplied history collected: the assistant's JSON replies,
+    plus the field-only user messages the fast path answered without one.
+    """
+    bill_info = {}
+    for message in chat_history or []:
+        content = message.get("content") or ""
+        if message.get("role") == "assistant":
+            bill_info = merge_fields(bill_info, parse_bill_info(content), replace_services=True)
+        elif message.get("role") == "user":
+            try:
+                fields = extract_fields(content, service_combination_service.catalog)
+            except Exception as e:
+                print("Local field extraction failed:", e)
+                fields = None
+            if fields:
+                bill_info = merge_fields(bill_info, fields)
+    return bill_info
+
+def open_session(req: ChatRequest):
+    """(session_id, session) for a chat request.
+
+    An unknown or expired session_id is only accepted together with the full
+    chat_history, which re-seeds the session (history and collected bill
+    info); otherwise UnknownSessionError tells the client to resend it.
+    """
+    store = get_session_store()
+    if req.session_id:
+        session = store.get(req.session_id)
+        if session is not None:
+            return req.session_id, session
+        if not req.chat_history:
+            raise UnknownSessionError(req.session_id)
+    session = new_session(req.chat_history)
+    session["bill_info"] = bill_info_from_history(req.chat_history)
+    return req.session_id or create_session_id(), session
+
+def chat_turn(req: ChatRequest):
+    session_id, session = open_session(req)
+    trace = {}
+    reply, bill_info, missing_fields = process_user_message(req.message, session["history"], session, trace)
+    get_session_store().save(session_id, session)
+    return session_id, reply, bill_info, missing_fields, trace
+
+def unknown_session_response(session_id: str) -> JSONResponse:
+    return JSONResponse(status_code=409, content={
+        "error": "Unknown or expired session; resend the request with the full chat_history",
+        "sessionId": session_id
+    })
+
+def finalize_reply(reply: str, bill_info: dict):
+    """Detect missing fields and prepend the billing summary once the bill is complete"""
     # Only detect missing fields for final billing, not for conversation
     essential_fields = ["patientName", "ohipNumber", "serviceDate"]
     missing_fields = [f for f in essential_fields if not bill_info.get(f)]
@@ -222,19 +344,89 @@ def process_user_message(user_message: str, chat_history: list):
 
 @app.post("/chat")
 async def chat_with_ai(req: ChatRequest):
-    user_message = req.message
-    chat_history = req.chat_history or []
-    reply, bill_info, missing_fields = process_user_message(user_message, chat_history)
+    try:
+        # The assistant run blocks for seconds; keep it off the event loop
+        session_id, reply, bill_info, missing_fields, trace = await run_blocking(CHAT_POOL, chat_turn, req)
+    except UnknownSessionError:
+        return unknown_session_response(req.session_id)
     return {
         "reply": reply,
         "billInfo": bill_info,
-        "missingFields": missing_fields
+        "missingFields": missing_fields,
+        "sessionId": session_id,
+        "trace": trace
     }
 
+@app.delete("/chat/session/{session_id}")
+async def end_chat_session(session_id: str):
+    await run_blocking(CHAT_POOL, get_session_store().delete, session_id)
+    return {"status": "deleted", "sessionId": session_id}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """/chat as Server-Sent Events.
+
+    Emits a `token` event ({"text": ...}) per reply delta, then one `done`
+    event with the same reply/billInfo/missingFields/sessionId body as /chat,
+    or an `error` event.
+    """
+    try:
+        session_id, session = await run_blocking(CHAT_POOL, open_session, req)
+    except UnknownSessionError:
+        return unknown_session_response(req.session_id)
+
+    async def events():
+        parts, trace = [], {}
+        try:
+            local = await run_blocking(CHAT_POOL, answer_locally, req.message, session, trace)
+            if local is not None:
+                answer, bill_info = local
+                yield sse_event("token", {"text": answer})
+            else:
+                async for delta in iterate_blocking(CHAT_POOL, stream_assistant_reply, req.message,
+                                                    session["history"], session["bill_info"], trace,
+                                                    session.get("earlier")):
+                    parts.append(delta)
+                    yield sse_event("token", {"text": delta})
+                answer = "".join(parts)
+                bill_info = merge_fields(session["bill_info"], parse_bill_info(answer), replace_services=True)
+                record_turn(session, req.message, answer, bill_info)
+            await run_blocking(CHAT_POOL, get_session_store().save, session_id, session)
+            reply, bill_info, missing_fields = finalize_reply(answer, bill_info)
+            yield sse_event("done", {"reply": reply, "billInfo": bill_info, "missingFields": missing_fields,
+                                     "sessionId": session_id, "trace": trace})
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+
+    # X-Accel-Buffering keeps the Nginx proxy from holding the events back
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/")
 async def root():
     return {"message": "Medical Billing Assistant API is running"}
 
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 503 until the startup warm-up has finished.
+
+    "degraded" means a warm-up step failed or the vector store is not
+    connected (e.g. Pinecone unreachable; it is retried every
+    VECTOR_STORE_RETRY_SECONDS); the app still serves what does not depend on
+    it, like lexical search.
+    """
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    failed = [name for name, value in app.state.warm_up.items()
+              if (isinstance(value, dict) or name == "error") and name != "vector_store"]
+    # Live state rather than the warm-up result, so a later reconnect clears it
+    if not enhanced_rag_service.connected:
+        failed.append("vector_store")
+    return {"status": "degraded" if failed else "ready", "failed": failed, "warmUp": app.state.warm_up}
+
 @app.post("/api/services/optimal")
 async def find_optimal_services(req: ServiceCombinationRequest):
     """Find optimal service combinations based on user description"""
@@ -277,57 +469,106 @@ async def suggest_alternatives(req: ServiceAlternativesRequest):
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/services/codes")
+async def list_services(prefix: str = "", category: str = "", start: str = "", end: str = "", limit: int = 100):
+    """List services by code prefix (e.g. A0), inclusive code range or category"""
+    try:
+        return service_combination_service.list_services(prefix, category, start, end, limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+def _search_services(query: str, limit: int, mode: str):
+    results = service_combination_service.search_services(query, limit=limit)
+    if mode == "hybrid":
+        dense = enhanced_rag_service.process_query(query, top_k=limit).get("services", [])
+        dense = [
+            {"code": d.get("code", ""), "description": d.get("name", ""),
+             "category": d.get("category", ""), "amount": d.get("fee", 0.0)}
+            for d in dense
+        ]
+        results = reciprocal_rank_fusion([results, dense], top_k=limit)
+    services = []
+    for result in results:
+        services.append({
+            "code": result.get("code", ""),
+            "description": result.get("description", ""),
+            "category": result.get("category", ""),
+            "charge": result.get("amount") or 0.0,
+            "similarity_score": result.get("score", 0.0)
+        })
+    return {"services": services, "mode": mode}
+
 @app.get("/api/services/search")
-async def search_services(query: str, limit: int = 10):
-    """Search for services using semantic search"""
+async def search_services(query: str, limit: int = 10, mode: str = "lexical"):
+    """Search for services with the local BM25 index.
+
+    mode=hybrid also runs the semantic (vector) search and fuses both rankings
+    with reciprocal rank fusion.
+    """
     try:
-        results = service_combination_service.rag_service.search_similar(query, top_k=limit)
-        services = []
-        for result in results:
-            services.append({
-                "code": result.metadata.get("code", ""),
-                "description": result.metadata.get("description", ""),
-                "category": result.metadata.get("category", ""),
-                "charge": result.metadata.get("charge", 0.0),
-                "similarity_score": result.score
-            })
-        return {"services": services}
+        if mode == "hybrid":
+            return await run_blocking(SEARCH_POOL, _search_services, query, limit, mode)
+        # BM25 over the in-memory index is sub-millisecond; a thread hop would cost more
+        return _search_services(query, limit, mode)
     except Exception as e:
         return {"error": str(e)}
 
+def _pinecone_search(query: str, top_k: int):
+    # 1. Get embedding (from the shared cache when this query was seen before)
+    embedding = get_embedding_cache().embed(
+        EMBEDDING_MODEL,
+        [query],
+        openai_embed_fn(get_openai_client(), EMBEDDING_MODEL)
+    )[0]
+    # 2. Query the vector index (Pinecone, or the local store if configured),
+    # over the app-wide connection pools
+    index = get_vector_index()
+    res = index.query(vector=embedding, top_k=top_k, include_metadata=True)
+    matches = res.matches if hasattr(res, 'matches') else res["matches"]
+    if not matches:
+        return {"result": None, "message": "No match found"}
+    # 3. Return top match info
+    top = matches[0]
+    meta = top.metadata
+    return {
+        "result": {
+            "code": meta.get("code", ""),
+            "name": meta.get("name", ""),
+            "description": meta.get("description", ""),
+            "amount": meta.get("fee", 0),
+            "category": meta.get("category", ""),
+            "section": meta.get("section", ""),
+            "notes": meta.get("notes", ""),
+            "score": top.score
+        }
+    }
+
 @app.get("/api/pinecone-search")
 async def pinecone_search(query: str, top_k: int = 1):
     """Semantic search for services using Pinecone"""
     try:
-        # 1. Get embedding
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        embedding_response = openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=query
-        )
-        embedding = embedding_response.data[0].embedding
-        # 2. Query Pinecone
-        pc = Pinecone(api_key=PINECONE_API_KEY)
-        index = pc.Index(PINECONE_INDEX_NAME)
-        res = index.query(vector=embedding, top_k=top_k, include_metadata=True)
-        matches = res.matches if hasattr(res, 'matches') else res["matches"]
-        if not matches:
-            return {"result": None, "message": "No match found"}
-        # 3. Return top match info
-        top = matches[0]
-        meta = top.metadata
-        return {
-            "result": {
-                "code": meta.get("code", ""),
-                "name": meta.get("name", ""),
-                "description": meta.get("description", ""),
-                "amount": meta.get("fee", 0),
-                "category": meta.get("category", ""),
-                "section": meta.get("section", ""),
-                "notes": meta.get("notes", ""),
-                "score": top.score
-            }
-        }
+        return await run_blocking(SEARCH_POOL, _pinecone_search, query, top_k)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit-rate metrics for the RAG result cache and the embedding cache, plus how chat turns were served"""
+    return {
+        "rag_results": enhanced_rag_service.cache_stats(),
+        "embeddings": get_embedding_cache().stats(),
+        "sessions": get_session_store().stats(),
+        "pools": pool_stats(),
+        "fast_path": fast_path_stats.stats(),
+        "routes": route_stats.stats()
+    }
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache():
+    """Reload the vector catalog (e.g. after an upload) and drop cached results"""
+    try:
+        await run_blocking(SEARCH_POOL, enhanced_rag_service.reload_catalog)
+        return {"status": "invalidated", "rag_results": enhanced_rag_service.cache_stats()}
     except Exception as e:
         return {"error": str(e)}
 
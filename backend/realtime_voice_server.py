@@ -14,6 +14,7 @@ load_dotenv()
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 try:
     from services.enhanced_rag_service import enhanced_rag_service
+    from services.blocking import SEARCH_POOL, run_blocking
 except ImportError:
     logger.warning("Could not import enhanced_rag_service. Voice responses may not use knowledge base.")
     enhanced_rag_service = None
@@ -43,7 +44,8 @@ class RealtimeVoiceServer:
                 
                 if len(multiple_services) > 1:
                     # Search for multiple services
-                    result = enhanced_rag_service.search_multiple_services(multiple_services, top_k=2)
+                    result = await run_blocking(SEARCH_POOL, enhanced_rag_service.search_multiple_services,
+                                                multiple_services, top_k=2)
                     if result.get('services'):
                         services_text = []
                         for svc in result['services'][:3]:  # Limit to top 3 results
@@ -52,7 +54,7 @@ class RealtimeVoiceServer:
                         return f"From knowledge base: {context}"
                 else:
                     # Single service search
-                    result = enhanced_rag_service.process_query(query, top_k=3)
+                    result = await run_blocking(SEARCH_POOL, enhanced_rag_service.process_query, query, top_k=3)
                     if isinstance(result, dict):
                         context = result.get('context', '')
                         if context:
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+load_dotenv(os.path.join(base_dir, '..', '.env'))
+
+# Allow importing the backend services package when run from backend/scripts
+sys.path.append(os.path.join(base_dir, '..'))
+from services.chat_backend import CHAT_BACKENDS, stream_reply
+from services.offline_clients import FakeChatClient
+
+PROMPT = "You are a helpful medical billing assistant. Reply with the bill as JSON when complete."
+MESSAGE = "John Smith, OHIP 1234567890, seen 2025-07-01 for a general assessment and a chest x-ray"
+HISTORY = [
+    {"role": "user", "content": "hi"},
+    {"role": "assistant", "content": "Hello! How can I help with your billing today?"},
+]
+CANNED_REPLY = (
+    "Thanks, here is the bill for John Smith. "
+    + json.dumps({
+        "patientName": "John Smith", "ohipNumber": "1234567890", "serviceDate": "2025-07-01",
+        "services": [
+            {"serviceName": "General assessment", "serviceCode": "A003", "unitPrice": 87.05},
+            {"serviceName": "Chest x-ray", "serviceCode": "X091", "unitPrice": 33.2},
+        ],
+    })
+)
+
+
+def time_turn(backend: str, client) -> tuple:
+    """(time to first token, total time, reply) for one chat turn"""
+    started = time.perf_counter()
+    first = None
+    parts = []
+    for delta in stream_reply(PROMPT, MESSAGE, HISTORY, backend=backend, client=client):
+        if first is None:
+            first = time.perf_counter() - started
+        parts.append(delta)
+    return first, time.perf_counter() - started, "".join(parts)
+
+
+def main():
+    """Time-to-first-token and total latency per CHAT_BACKEND"""
+    parser = argparse.ArgumentParser(description="Compare chat backends (polled run vs streamed calls).")
+    parser.add_argument("--backends", nargs="+", choices=CHAT_BACKENDS, default=list(CHAT_BACKENDS))
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns per backend")
+    parser.add_argument("--live", action="store_true",
+                        help="Call the OpenAI API (needs OPENAI_API_KEY and ASSISTANT_ID) instead of the fake client")
+    parser.add_argument("--round-trip", type=float, default=0.15, help="Fake client: seconds per request")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Fake client: seconds per token")
+    args = parser.parse_args()
+
+    if args.live:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    else:
+        client = FakeChatClient(CANNED_REPLY, round_trip=args.round_trip, token_latency=args.token_latency)
+
+    print(f"=== Chat backends ({args.turns} turns each, {'live' if args.live else 'fake client'}) ===")
+    print(f"{'backend':<17} {'TTFT p50':>9} {'total p50':>10} {'requests':>9}")
+    replies = {}
+    for backend in args.backends:
+        requests_before = getattr(client, "requests", 0)
+        timings = [time_turn(backend, client) for _ in range(args.turns)]
+        replies[backend] = timings[-1][2]
+        requests = (getattr(client, "requests", 0) - requests_before) / args.turns if not args.live else float("nan")
+        print(f"{backend:<17} {statistics.median(t[0] for t in timings):>8.3f}s "
+              f"{statistics.median(t[1] for t in timings):>9.3f}s {requests:>9.1f}")
+    if not args.live:
+        print(f"\nSame reply text from every backend: {len(set(replies.values())) == 1}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import re
+import time
+from dataclasses import asdict
+from typing import List
+
+import pdfplumber
+
+from extract_services_from_pdf import BillingRule, PDFServiceExtractor, ServiceItem
+
+
+class LegacyExtractor(PDFServiceExtractor):
+    """The multi-pattern extractor the single-pass scanner replaced, kept for comparison"""
+
+    def _extract_services_from_text(self, text: str, page_num: int, section: str = None) -> List[ServiceItem]:
+        services = []
+        service_patterns = [
+            r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s+(\$?\d+\.?\d*)',
+            r'([A-Z]\d{3,4})\s*[-–]\s*([A-Za-z\s,]+?)\s*[-–]\s*(\$?\d+\.?\d*)',
+            r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s*\((\$?\d+\.?\d*)\)',
+            r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+\.?\d*)',
+            r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+)',
+            r'([A-Z]\d{3,4})\s+(\d+\.?\d*)',
+        ]
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            for pattern in service_patterns:
+                for match in re.findall(pattern, line):
+                    if len(match) == 3:
+                        code, name, fee_str = match
+                    else:
+                        code, fee_str = match
+                        name = code
+                    code = code.strip()
+                    name = name.strip()
+                    fee_str = fee_str.replace('$', '').strip()
+                    if len(code) < 3 or not code[0].isalpha():
+                        continue
+                    try:
+                        fee = float(fee_str)
+                        if fee < 1.0:
+                            continue
+                    except ValueError:
+                        fee = 0.0
+                    if not any(s.code == code for s in services):
+                        services.append(ServiceItem(
+                            code=code, name=name, description=name, fee=fee,
+                            category=self._categorize_service(code, name), billing_constraints=[],
+                            page_number=page_num, section=self.current_section if section is None else section,
+                        ))
+        return services
+
+    def _extract_rules_from_text(self, text: str, page_num: int, section: str = None) -> List[BillingRule]:
+        rules = []
+        rule_patterns = [
+            r'([^.]*(?:is only eligible for payment if|is not eligible for payment when|not eligible for payment)[^.]*\.)',
+            r'([^.]*(?:cannot|can\'t|not allowed|prohibited|restricted|excluded|no more than|not to be billed)[^.]*\.)',
+            r'([^.]*(?:same day|concurrent|simultaneous|within|during|on the same|in the same)[^.]*\.)',
+            r'([^.]*(?:if|when|provided|subject to|conditional|unless|except)[^.]*\.)',
+            r'([^.]*(?:submit claims|claims submission|bill|billing|claim|report|document)[^.]*\.)',
+            r'([^.]*(?:not covered|not eligible|not payable|not reimbursed)[^.]*\.)',
+            r'([^.]*(?:reduce.*fee|increase.*fee|adjust.*fee|fee.*reduced|fee.*increased)[^.]*\.)',
+            r'([^.]*(?:special|additional|extra|premium|bonus|add|plus)[^.]*\.)',
+            r'([^.]*(?:must|should|required|mandatory|obligatory)[^.]*\.)',
+            r'([^.]*(?:when rendered with|in combination with|together with)[^.]*\.)',
+            r'([^.]*(?:minimum.*minutes|at least.*minutes|spend.*minutes)[^.]*\.)',
+            r'([^.]*(?:recorded in|documented in|permanent medical record)[^.]*\.)',
+        ]
+        counter = 1
+        for sentence in re.split(r'[.!?]', text):
+            sentence = sentence.strip()
+            if len(sentence) < 10:
+                continue
+            for pattern in rule_patterns:
+                for match in re.findall(pattern, sentence, re.IGNORECASE):
+                    if match and len(match.strip()) > 8:
+                        rules.append(BillingRule(
+                            rule_id=f"RULE_{page_num}_{counter}", rule_type=self._classify_rule_type(match),
+                            description=match, affected_codes=re.findall(r'[A-Z]\d{3,4}', match),
+                            conditions=self._extract_conditions(match), page_number=page_num,
+                            section=self.current_section if section is None else section,
+                        ))
+                        counter += 1
+        return rules
+
+
+def time_pages(extractor: PDFServiceExtractor, pages: List[str], repeat: int):
+    """Best-of-``repeat`` seconds to process all pages, plus the last run's results"""
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [extractor._process_page(text, i + 1) for i, text in enumerate(pages)]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    """Compare per-page extraction time of the legacy and single-pass scanners"""
+    parser = argparse.ArgumentParser(description="Benchmark service/rule extraction on Schedule of Benefits pages.")
+    parser.add_argument("--pdf", default="../../Ohip Benefits.pdf", help="Schedule of Benefits PDF")
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--end-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    print(f"Reading text of pages {args.start_page}-{args.end_page} from {args.pdf}...")
+    with pdfplumber.open(args.pdf) as pdf:
+        end_page = min(args.end_page, len(pdf.pages))
+        pages = [pdf.pages[i].extract_text() or "" for i in range(args.start_page - 1, end_page)]
+
+    legacy_time, legacy = time_pages(LegacyExtractor(args.pdf), pages, args.repeat)
+    scanner_time, scanner = time_pages(PDFServiceExtractor(args.pdf), pages, args.repeat)
+
+    same_services = all(
+        [asdict(s) for s in old.services] == [asdict(s) for s in new.services]
+        for old, new in zip(legacy, scanner)
+    )
+    n = len(pages) or 1
+    print(f"\n=== Extraction Benchmark ({len(pages)} pages, best of {args.repeat}) ===")
+    print(f"{'implementation':<14} {'ms/page':>9} {'services':>9} {'rules':>7}")
+    for label, seconds, results in (("legacy", legacy_time, legacy), ("single-pass", scanner_time, scanner)):
+        print(f"{label:<14} {seconds / n * 1000:>9.3f} {sum(len(r.services) for r in results):>9} "
+              f"{sum(len(r.rules) for r in results):>7}")
+    print(f"Speedup: {legacy_time / scanner_time:.1f}x")
+    print(f"Identical services: {same_services}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+from extract_services_from_pdf import PDFServiceExtractor
+from pdf_text_backends import BACKENDS, DEFAULT_BACKEND, open_backend
+
+
+def main():
+    """Compare PDF text backends: pages/second and service/rule yield against pdfplumber"""
+    parser = argparse.ArgumentParser(description="Benchmark PDF text backends on the Schedule of Benefits.")
+    parser.add_argument("--pdf", default="../../Ohip Benefits.pdf", help="Schedule of Benefits PDF")
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--end-page", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS),
+                        help=f"Backends to compare (codes are compared against {DEFAULT_BACKEND})")
+    args = parser.parse_args()
+
+    backends = [DEFAULT_BACKEND] + [b for b in args.backends if b != DEFAULT_BACKEND]
+    results = {}
+    for name in backends:
+        try:
+            source = open_backend(name, args.pdf)
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        end_page = min(args.end_page, len(source))
+        started = time.perf_counter()
+        texts = [source.text(page_num) for page_num in range(args.start_page, end_page + 1)]
+        elapsed = time.perf_counter() - started
+        source.close()
+
+        extractor = PDFServiceExtractor(args.pdf)
+        services, rules = {}, 0
+        for page_num, text in enumerate(texts, start=args.start_page):
+            page = extractor._process_page(text, page_num)
+            for service in page.services:
+                services.setdefault(service.code, service.fee)
+            rules += len(page.rules)
+        results[name] = (len(texts), elapsed, services, rules)
+        print(f"{name}: {len(texts)} pages in {elapsed:.2f}s")
+
+    reference = results.get(DEFAULT_BACKEND, (0, 0, {}, 0))[2]
+    print(f"\n=== PDF Text Backends (pages {args.start_page}-{args.end_page}) ===")
+    print(f"{'backend':<11} {'pages/s':>8} {'services':>9} {'rules':>6} {'missing':>8} {'extra':>6} {'fee diff':>9}")
+    for name, (pages, elapsed, services, rules) in results.items():
+        missing = len(reference.keys() - services.keys())
+        extra = len(services.keys() - reference.keys())
+        fee_diff = sum(1 for code in reference.keys() & services.keys() if reference[code] != services[code])
+        print(f"{name:<11} {pages / elapsed if elapsed else 0:>8.1f} {len(services):>9} {rules:>6} "
+              f"{missing:>8} {extra:>6} {fee_diff:>9}")
+    print(f"\nmissing/extra/fee diff are billing codes compared with {DEFAULT_BACKEND}.")
+
+
+if __name__ == "__main__":
+    main()
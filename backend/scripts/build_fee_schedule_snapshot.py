@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+import time
+
+# Allow importing the backend services package when run from backend/scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.fee_schedule import DATA_DIR, SNAPSHOT_FILENAME, FeeSchedule, build_snapshot
+
+def main():
+    """Compile data/dataset_schedule_of_benefits_*.csv into the fee schedule snapshot"""
+    parser = argparse.ArgumentParser(description="Build the memory-mapped fee schedule snapshot.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory containing the schedule CSVs")
+    parser.add_argument("--output", help=f"Snapshot path (default: <data-dir>/{SNAPSHOT_FILENAME})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_snapshot(args.data_dir, args.output)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    schedule = FeeSchedule(path)
+    open_time = time.perf_counter() - start
+
+    priced = sum(1 for i in range(len(schedule)) if schedule.amount(i) is not None)
+    print(f"Snapshot written to: {path}")
+    print(f"Billing codes: {len(schedule)} ({priced} with a fee)")
+    print(f"Size: {os.path.getsize(path) / 1024:.1f} KiB")
+    print(f"Build time: {build_time * 1000:.0f} ms, open time: {open_time * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from extract_services_from_pdf import BillingRule, ExtractionCheckpoint, PageResult, ServiceItem
+
+HEADER = {"pdf_hash": "checkpoint-check", "backend": "none", "start_page": 1, "end_page": 0}
+
+
+def page(number: int) -> PageResult:
+    section = f"Section {number // 5}"
+    return PageResult(
+        page_number=number,
+        section=section,
+        services=[ServiceItem(code=f"A{number:03d}", name=f"Service {number}", description="", fee=10.0 + number,
+                              category="", billing_constraints=[], page_number=number, section=section)],
+        rules=[BillingRule(rule_id=f"rule_{number}", rule_type="restriction", description=f"Rule {number}",
+                           affected_codes=[f"A{number:03d}"], conditions=[], page_number=number, section=section)],
+    )
+
+
+def run(path: str, pages: int, every: int, kill_after: int = 0) -> int:
+    """Checkpoint pages like the extractor does; with ``kill_after`` stop mid-write of that page.
+
+    Returns the number of pages restored from the existing checkpoint.
+    """
+    checkpoint = ExtractionCheckpoint(path, HEADER, every=every)
+    records = checkpoint.load()
+    first_page = records[-1]["page_number"] + 1 if records else 1
+    checkpoint.start(resume=bool(records))
+    for number in range(first_page, pages + 1):
+        if number == kill_after:
+            # A kill during the write leaves the flushed pages plus part of this one
+            checkpoint.add(page(number), f"Section {number // 5}")
+            torn = checkpoint._buffer[-1]
+            checkpoint._buffer = checkpoint._buffer[:-1]
+            checkpoint.flush()
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(torn[:len(torn) // 2])
+            return len(records)
+        checkpoint.add(page(number), f"Section {number // 5}")
+    checkpoint.flush()
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kill a checkpointed run mid-write, resume it twice and check "
+                                                 "that every page is restored exactly once")
+    parser.add_argument("--pages", type=int, default=30, help="Pages in the simulated run")
+    parser.add_argument("--every", type=int, default=4, help="Pages buffered between checkpoint writes")
+    args = parser.parse_args()
+
+    first_kill, second_kill = args.pages // 3, 2 * args.pages // 3
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extraction.ckpt.jsonl")
+        run(path, args.pages, args.every, kill_after=first_kill)
+        restored = run(path, args.pages, args.every, kill_after=second_kill)
+        print(f"First resume restored {restored} pages (killed while writing page {first_kill})")
+        if restored != first_kill - 1:
+            failures.append(f"first resume restored {restored} pages, expected {first_kill - 1}")
+        restored = run(path, args.pages, args.every)
+        print(f"Second resume restored {restored} pages (killed while writing page {second_kill})")
+        if restored != second_kill - 1:
+            failures.append(f"second resume restored {restored} pages, expected {second_kill - 1}")
+
+        records = ExtractionCheckpoint(path, HEADER).load()
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        numbers = [record["page_number"] for record in records]
+        if numbers != list(range(1, args.pages + 1)):
+            failures.append(f"checkpoint holds pages {numbers}, expected 1-{args.pages}")
+        if len(lines) != args.pages + 2 or lines[-1]:
+            failures.append(f"checkpoint has {len(lines) - 1} lines, expected a header and {args.pages} pages")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
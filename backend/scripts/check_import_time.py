@@ -0,0 +1,81 @@
+import argparse
+import os
+import subprocess
+import sys
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+backend_dir = os.path.join(base_dir, '..')
+
+# Heavy SDKs that must only load on first use, never while importing the app
+DEFAULT_FORBIDDEN = ["langchain", "langchain_core", "langchain_openai", "langchain_pinecone",
+                     "pinecone", "openai", "websockets", "numpy", "pandas"]
+
+
+def measure(module: str):
+    """Cumulative microseconds per imported module and per direct import of ``module``.
+
+    ``-X importtime`` prints a module after everything it imported, indented
+    two spaces per nesting level.
+    """
+    env = dict(os.environ)
+    # main.py only reads the keys; placeholders keep the check runnable without a .env
+    env.setdefault("OPENAI_API_KEY", "import-time-check")
+    env.setdefault("PINECONE_API_KEY", "import-time-check")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_dir, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    timings, children, pending = {}, {}, {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        timings[name] = int(cumulative)
+        if depth == 1:
+            pending[name] = int(cumulative)
+        elif depth == 0:
+            if name == module:
+                children = pending
+            pending = {}
+    return timings, children
+
+
+def main():
+    """Fail (exit 1) when importing the API module exceeds its startup budget"""
+    parser = argparse.ArgumentParser(description="Import-time budget check for the FastAPI app (-X importtime).")
+    parser.add_argument("--module", default="main", help="Module to import from the backend directory")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum cumulative import time")
+    parser.add_argument("--runs", type=int, default=3, help="Imports to measure; the fastest one is judged")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Top-level packages that must not be imported at startup")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    timings, children = min(runs, key=lambda run: run[0].get(args.module, 0))
+    total_ms = timings.get(args.module, 0) / 1000
+
+    print(f"=== import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs}) ===")
+    for name, us in sorted(children.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({name.split(".")[0] for name in timings} & set(args.forbid))
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)} (import them lazily)")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
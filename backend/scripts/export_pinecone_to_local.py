@@ -0,0 +1,42 @@
+import os
+import sys
+from dotenv import load_dotenv
+from pinecone import Pinecone
+
+# Load environment variables
+base_dir = os.path.abspath(os.path.dirname(__file__))
+load_dotenv(os.path.join(base_dir, '..', '.env'))
+
+# Allow importing the backend services package when run from backend/scripts
+sys.path.append(os.path.join(base_dir, '..'))
+from services.local_vector_store import DEFAULT_STORE_PATH, LocalVectorStore
+
+def export_index(index, store: LocalVectorStore, batch_size: int = 100) -> int:
+    """Copy every vector (values + metadata) from a Pinecone index into the local store"""
+    exported = 0
+    for ids in index.list(limit=batch_size):
+        fetched = index.fetch(ids=list(ids))
+        vectors = fetched.vectors if hasattr(fetched, 'vectors') else fetched["vectors"]
+        store.upsert([
+            {"id": vector_id, "values": vector.values, "metadata": vector.metadata or {}}
+            for vector_id, vector in vectors.items()
+        ])
+        exported += len(vectors)
+        print(f"Exported {exported} vectors")
+    return exported
+
+def main():
+    """Snapshot the Pinecone index into the local vector store (VECTOR_STORE_BACKEND=local)"""
+    output_path = os.getenv("LOCAL_VECTOR_STORE_PATH", DEFAULT_STORE_PATH)
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    index = pc.Index(os.getenv("PINECONE_INDEX_NAME", "medical-bills"))
+    
+    store = LocalVectorStore(output_path)
+    total = export_index(index, store)
+    store.save()
+    
+    print(f"\nExported {total} vectors to: {output_path}")
+    print("Set VECTOR_STORE_BACKEND=local to serve searches from it")
+
+if __name__ == "__main__":
+    main()
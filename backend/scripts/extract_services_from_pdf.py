@@ -1,11 +1,69 @@
-import pdfplumber
+import argparse
 import json
 import re
 import os
-from typing import List, Dict, Any
-from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 
+from extraction_store import write_parquet
+from pdf_page_cache import DEFAULT_CACHE_PATH, CachedPDF, PageCache, file_hash
+from pdf_text_backends import BACKENDS, DEFAULT_BACKEND
+
+# Service item patterns - find codes, names, fees (in priority order)
+SERVICE_PATTERNS = [re.compile(p) for p in (
+    # Pattern 1: code name fee
+    r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s+(\$?\d+\.?\d*)',
+    # Pattern 2: code - name - fee
+    r'([A-Z]\d{3,4})\s*[-–]\s*([A-Za-z\s,]+?)\s*[-–]\s*(\$?\d+\.?\d*)',
+    # Pattern 3: code name (fee)
+    r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s*\((\$?\d+\.?\d*)\)',
+    # Pattern 4: code followed by description and fee
+    r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+\.?\d*)',
+    # Pattern 5: code with description containing numbers
+    r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+)',
+    # Pattern 6: simple code and fee
+    r'([A-Z]\d{3,4})\s+(\d+\.?\d*)',
+)]
+CODE_RE = re.compile(r'[A-Z]\d{3,4}')
+
+SECTION_PATTERNS = [re.compile(p) for p in (
+    r'^([A-Z][A-Z\s]+)$',  # All caps titles
+    r'^(\d+\.\s*[A-Z][A-Za-z\s]+)$',  # Numbered titles
+    r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s*:?)$'  # Title case titles
+)]
+
+# Keywords that make a sentence a billing rule, matched as whole words
+RULE_KEYWORDS = [
+    # Eligibility rules / service restrictions
+    r'(?:is only |is )?(?:not )?eligible for payment', r'not covered', r'not payable', r'not reimbursed',
+    r'cannot', r"can't", r'not allowed', r'prohibited', r'restricted', r'excluded',
+    r'no more than', r'not to be billed',
+    # Time-based rules and service combinations
+    r'same day', r'concurrent', r'simultaneous', r'within', r'during', r'on the same', r'in the same',
+    r'when rendered with', r'in combination with', r'together with',
+    # Conditional rules
+    r'if', r'when', r'provided', r'subject to', r'conditional', r'unless', r'except',
+    # Billing instructions and documentation
+    r'submit claims', r'claims submission', r'bill(?:s|ed|ing)?', r'claims?', r'report(?:s|ed|ing)?',
+    r'document(?:s|ed|ation)?', r'recorded in', r'permanent medical record',
+    # Fee adjustments
+    r'(?:reduc|increas|adjust)\w*\b.*?\bfees?', r'fees?\b.*?\b(?:reduced|increased)',
+    # Special conditions
+    r'special', r'additional', r'extra', r'premium', r'bonus', r'add', r'plus',
+    # Administrative rules
+    r'must', r'should', r'required', r'mandatory', r'obligatory',
+    # Time requirements
+    r'(?:minimum|at least|spend)\b.*?\bminutes',
+]
+RULE_KEYWORD_RE = re.compile(r'\b(?:' + '|'.join(RULE_KEYWORDS) + r')\b', re.IGNORECASE)
+# Sentence ends, but not decimal points in fees; a line starting with a code
+# or ending in a fee also ends the sentence so fee listings don't run into
+# the next rule
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])(?!\d)|\n(?=[A-Z]\d{3,4}\s)|(?<=\d\.\d\d)\n')
+
 @dataclass
 class ServiceItem:
     """Medical billing service item data structure"""
@@ -30,39 +88,247 @@ class BillingRule:
     page_number: int
     section: str
 
+@dataclass
+class PageResult:
+    """Everything extracted from one page, before section carry-over is applied"""
+    page_number: int
+    section: str  # header found on this page, "" if none
+    services: List[ServiceItem] = field(default_factory=list)
+    rules: List[BillingRule] = field(default_factory=list)
+
+def _extract_page_range(pdf_path: str, start_page: int, end_page: int, cache_path: Optional[str] = None,
+                        page_hashes: Optional[List[str]] = None,
+                        backend: str = DEFAULT_BACKEND) -> Tuple[List[PageResult], Dict[str, int]]:
+    """Process-pool worker: extract pages start_page..end_page (1-based, inclusive)"""
+    extractor = PDFServiceExtractor(pdf_path, cache_path=cache_path, backend=backend)
+    results = []
+    with extractor.open_pdf(page_hashes) as pdf:
+        for page_num in range(start_page, end_page + 1):
+            text = pdf.text(page_num)
+            if text:
+                results.append(extractor._process_page(text, page_num))
+        return results, pdf.stats()
+
+# Pages per process-pool task; also bounds how many finished pages wait in memory
+MAX_CHUNK_PAGES = 25
+
+def _page_chunks(start_page: int, end_page: int, workers: int) -> List[Tuple[int, int]]:
+    """Split a page range into ~4 chunks per worker so slow pages even out"""
+    total = end_page - start_page + 1
+    size = min(max(1, -(-total // (workers * 4))), MAX_CHUNK_PAGES)
+    return [(first, min(first + size - 1, end_page)) for first in range(start_page, end_page + 1, size)]
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, int]]:
+    """Parse a page selector such as "1-20,35,40-42" into inclusive ranges"""
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        first, last = int(first), int(last or first)
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: {part}")
+        ranges.append((first, last))
+    return ranges
+
+def format_page_ranges(pages: Iterable[int]) -> str:
+    """Page selector such as "1-3,7" for a set of pages (the inverse of parse_page_ranges)"""
+    ranges = []
+    for page in sorted(set(pages)):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ",".join(f"{a}-{b}" if a != b else str(a) for a, b in ranges)
+
+class ExtractionCheckpoint:
+    """Append-only JSON Lines checkpoint of finished pages.
+
+    The first line identifies the run (PDF hash, backend, page range); every
+    further line holds one page's services and rules plus the section in
+    effect after it. Pages are buffered and written every ``every`` pages, so
+    a crash loses at most that many. A torn last line is ignored on load and
+    cut off before the run resumes appending.
+    """
+    
+    def __init__(self, path: str, header: Dict[str, Any], every: int = 10):
+        self.path = path
+        self.header = header
+        self.every = max(1, every)
+        self._buffer: List[str] = []
+        self._valid_bytes = 0
+    
+    def load(self) -> List[Dict[str, Any]]:
+        """Page records of a previous run with the same header ([] if none)"""
+        self._valid_bytes = 0
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'rb') as f:
+            for number, line in enumerate(f):
+                if not line.endswith(b'\n'):
+                    break  # interrupted mid-write
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                if number == 0 and record != self.header:
+                    print(f"Checkpoint {self.path} is for a different PDF or page range, ignoring it")
+                    return []
+                if number > 0:
+                    records.append(record)
+                self._valid_bytes += len(line)
+        return records
+    
+    def start(self, resume: bool):
+        """Begin writing: keep the valid records when resuming, otherwise start over"""
+        if resume and os.path.exists(self.path) and self._valid_bytes:
+            # Drop whatever a killed run left after the last complete record
+            os.truncate(self.path, self._valid_bytes)
+            return
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.header) + '\n')
+    
+    def add(self, result: PageResult, section: str):
+        self._buffer.append(json.dumps({
+            "page_number": result.page_number,
+            "current_section": section,
+            "services": [asdict(service) for service in result.services],
+            "rules": [asdict(rule) for rule in result.rules],
+        }, ensure_ascii=False))
+        if len(self._buffer) >= self.every:
+            self.flush()
+    
+    def flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
+    
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 class PDFServiceExtractor:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, cache_path: Optional[str] = None, backend: str = DEFAULT_BACKEND):
         self.pdf_path = pdf_path
+        # Page text cache (see pdf_page_cache); None parses every page
+        self.cache_path = cache_path
+        # Page text backend (see pdf_text_backends)
+        self.backend = backend
         self.services = []
         self.rules = []
         self.current_section = ""
         
-    def extract_services_and_rules(self, start_page: int = 1, end_page: int = None) -> Dict[str, Any]:
-        """Extract service items and rules from PDF"""
-        print(f"Starting PDF extraction, file: {self.pdf_path}")
+    def open_pdf(self, page_hashes: Optional[List[str]] = None) -> CachedPDF:
+        """Page text source, going through the page cache when one is configured"""
+        cache = PageCache(self.cache_path) if self.cache_path else None
+        return CachedPDF(self.pdf_path, cache, page_hashes, backend=self.backend)
+    
+    def page_range(self, start_page: int = 1, end_page: int = None) -> Tuple[int, int]:
+        """Clamp a 1-based page range to the document"""
+        with self.open_pdf() as pdf:
+            total_pages = len(pdf)
+        return start_page, min(end_page or total_pages, total_pages)
+    
+    def iter_pages(self, start_page: int = 1, end_page: int = None, workers: int = 1) -> Iterator[PageResult]:
+        """Yield per-page results in page order without accumulating them
+
+        Section carry-over is applied before each page is yielded. With
+        ``workers > 1`` page ranges are extracted in a process pool with a
+        bounded number of ranges in flight; results are still yielded in
+        page order, so the output is the same as a sequential run.
+        """
+        start_page, end_page = self.page_range(start_page, end_page)
+        print(f"Extraction range: {start_page}-{end_page}, workers: {workers}, backend: {self.backend}")
+        
+        if workers <= 1:
+            with self.open_pdf() as pdf:
+                for page_num in range(start_page, end_page + 1):
+                    print(f"Processing page {page_num}...")
+                    text = pdf.text(page_num)
+                    if text:
+                        yield self._carry_section(self._process_page(text, page_num))
+                self._report_cache(pdf.stats())
+            return
         
-        with pdfplumber.open(self.pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            end_page = end_page or total_pages
+        # Hash pages once here rather than in every worker
+        page_hashes = None
+        if self.cache_path:
+            with self.open_pdf() as pdf:
+                page_hashes = pdf.page_hashes
+        chunks = iter(_page_chunks(start_page, end_page, workers))
+        cache_stats = {"hits": 0, "misses": 0}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
             
-            print(f"PDF total pages: {total_pages}, extraction range: {start_page}-{end_page}")
+            def submit_next():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append((chunk, executor.submit(_extract_page_range, self.pdf_path, *chunk,
+                                                           self.cache_path, page_hashes, self.backend)))
             
-            for page_num in range(start_page - 1, min(end_page, total_pages)):
-                print(f"Processing page {page_num + 1}...")
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-                
-                if text:
-                    # Update current section
-                    self._update_current_section(text)
-                    
-                    # Extract service items
-                    services_on_page = self._extract_services_from_text(text, page_num + 1)
-                    self.services.extend(services_on_page)
-                    
-                    # Extract rules
-                    rules_on_page = self._extract_rules_from_text(text, page_num + 1)
-                    self.rules.extend(rules_on_page)
+            for _ in range(workers * 2):
+                submit_next()
+            while pending:
+                # Oldest range first keeps the output in page order
+                (first, last), future = pending.popleft()
+                page_results, stats = future.result()
+                submit_next()
+                print(f"Processed pages {first}-{last}")
+                for key in cache_stats:
+                    cache_stats[key] += stats[key]
+                for page_result in page_results:
+                    yield self._carry_section(page_result)
+        self._report_cache(cache_stats)
+    
+    def _report_cache(self, stats: Dict[str, int]):
+        if self.cache_path:
+            print(f"Page cache: {stats['hits']} pages reused, {stats['misses']} parsed ({self.cache_path})")
+    
+    def extract_services_and_rules(self, start_page: int = 1, end_page: int = None, workers: int = 1,
+                                   checkpoint_path: Optional[str] = None, resume: bool = False,
+                                   checkpoint_every: int = 10) -> Dict[str, Any]:
+        """Extract service items and rules from PDF (see ``iter_pages`` for ``workers``)
+
+        With ``checkpoint_path`` finished pages are checkpointed every
+        ``checkpoint_every`` pages; ``resume=True`` reloads them (and the
+        section state) and continues after the last checkpointed page.
+        """
+        print(f"Starting PDF extraction, file: {self.pdf_path}")
+        start_page, end_page = self.page_range(start_page, end_page)
+        
+        checkpoint = None
+        first_page = start_page
+        if checkpoint_path:
+            checkpoint = ExtractionCheckpoint(checkpoint_path, {
+                "pdf_hash": file_hash(self.pdf_path),
+                "backend": self.backend,
+                "start_page": start_page,
+                "end_page": end_page,
+            }, every=checkpoint_every)
+            records = checkpoint.load() if resume else []
+            for record in records:
+                self.services.extend(ServiceItem(**service) for service in record['services'])
+                self.rules.extend(BillingRule(**rule) for rule in record['rules'])
+                self.current_section = record['current_section']
+                first_page = record['page_number'] + 1
+            if records:
+                print(f"Resuming after page {first_page - 1}: {len(self.services)} services and "
+                      f"{len(self.rules)} rules restored from {checkpoint_path}")
+            checkpoint.start(resume=bool(records))
+        
+        for page_result in self.iter_pages(first_page, end_page, workers):
+            self.services.extend(page_result.services)
+            self.rules.extend(page_result.rules)
+            if checkpoint:
+                checkpoint.add(page_result, self.current_section)
+        if checkpoint:
+            checkpoint.flush()
         
         return {
             "services": [asdict(service) for service in self.services],
@@ -71,155 +337,177 @@ class PDFServiceExtractor:
                 "total_services": len(self.services),
                 "total_rules": len(self.rules),
                 "pages_processed": end_page - start_page + 1,
+                "processed_pages": format_page_ranges(range(start_page, end_page + 1)),
                 "extraction_date": datetime.now().isoformat()
             }
         }
     
-    def _update_current_section(self, text: str):
-        """Update current section information"""
-        # Find section titles
-        section_patterns = [
-            r'^([A-Z][A-Z\s]+)$',  # All caps titles
-            r'^(\d+\.\s*[A-Z][A-Za-z\s]+)$',  # Numbered titles
-            r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s*:?)$'  # Title case titles
-        ]
+    def extract_pages(self, page_ranges: List[Tuple[int, int]], existing: Optional[Dict[str, Any]] = None,
+                      workers: int = 1) -> Dict[str, Any]:
+        """Re-extract only the given page ranges and merge them into ``existing`` output
+
+        Items from the selected pages are replaced; everything else is kept
+        as is. Each range starts with the section of the last existing item
+        before it, as a full run would have carried it (a header that changed
+        inside the selection is not propagated to pages after it).
+        """
+        existing = existing or {"services": [], "rules": [], "summary": {}}
+        selected = set()
+        services, rules = [], []
+        for first, last in page_ranges:
+            first, last = self.page_range(first, last)
+            selected.update(range(first, last + 1))
+            earlier = [item for item in existing['services'] + existing['rules'] if item['page_number'] < first]
+            self.current_section = max(earlier, key=lambda item: item['page_number'])['section'] if earlier else ""
+            for page_result in self.iter_pages(first, last, workers):
+                services.extend(asdict(service) for service in page_result.services)
+                rules.extend(asdict(rule) for rule in page_result.rules)
+        
+        page_order = lambda item: item['page_number']
+        services = sorted([s for s in existing['services'] if s['page_number'] not in selected] + services,
+                          key=page_order)
+        rules = sorted([r for r in existing['rules'] if r['page_number'] not in selected] + rules, key=page_order)
+        print(f"Re-extracted {len(selected)} pages: {sum(s['page_number'] in selected for s in services)} services, "
+              f"{sum(r['page_number'] in selected for r in rules)} rules")
         
+        # Pages covered by the existing output (from its summary, else from its items) plus the selection
+        summary = existing.get('summary', {})
+        if summary.get('processed_pages'):
+            processed = {page for first, last in parse_page_ranges(summary['processed_pages'])
+                         for page in range(first, last + 1)}
+        else:
+            processed = {item['page_number'] for item in existing['services'] + existing['rules']}
+        processed |= selected
+        return {
+            "services": services,
+            "rules": rules,
+            "summary": {
+                **summary,
+                "total_services": len(services),
+                "total_rules": len(rules),
+                "pages_processed": len(processed),
+                "processed_pages": format_page_ranges(processed),
+                "reextracted_pages": ",".join(f"{a}-{b}" if a != b else str(a) for a, b in page_ranges),
+                "extraction_date": datetime.now().isoformat()
+            }
+        }
+    
+    def _process_page(self, text: str, page_num: int) -> PageResult:
+        """Extract one page without depending on earlier pages"""
+        section = self._page_section(text)
+        return PageResult(
+            page_number=page_num,
+            section=section,
+            services=self._extract_services_from_text(text, page_num, section),
+            rules=self._extract_rules_from_text(text, page_num, section),
+        )
+    
+    def _carry_section(self, result: PageResult) -> PageResult:
+        """Give header-less pages the last seen section (pages must arrive in order)"""
+        if result.section:
+            self.current_section = result.section
+        else:
+            for item in result.services + result.rules:
+                item.section = self.current_section
+        return result
+    
+    def _page_section(self, text: str) -> str:
+        """Section title found in the first lines of a page, "" if none"""
+        section = ""
         lines = text.split('\n')
         for line in lines[:5]:  # Only check first 5 lines
             line = line.strip()
-            for pattern in section_patterns:
-                if re.match(pattern, line) and len(line) > 3:
-                    self.current_section = line
+            for pattern in SECTION_PATTERNS:
+                if len(line) > 3 and pattern.match(line):
+                    section = line
                     break
+        return section
     
-    def _extract_services_from_text(self, text: str, page_num: int) -> List[ServiceItem]:
-        """Extract service items from text"""
+    def _extract_services_from_text(self, text: str, page_num: int,
+                                    section: Optional[str] = None) -> List[ServiceItem]:
+        """Extract service items from text
+
+        Single pass: only lines containing a code are looked at, and every
+        pattern is tried anchored at each code. Candidates are taken in
+        (pattern, position) order per line, which is the order the per-pattern
+        ``findall`` scans used to produce, so the first pattern that yields a
+        usable fee still wins for each code.
+        """
         services = []
+        seen = set()
         
-        # Service item patterns - find codes, names, fees
-        service_patterns = [
-            # Pattern 1: code name fee
-            r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s+(\$?\d+\.?\d*)',
-            # Pattern 2: code - name - fee
-            r'([A-Z]\d{3,4})\s*[-–]\s*([A-Za-z\s,]+?)\s*[-–]\s*(\$?\d+\.?\d*)',
-            # Pattern 3: code name (fee)
-            r'([A-Z]\d{3,4})\s+([A-Za-z\s,]+?)\s*\((\$?\d+\.?\d*)\)',
-            # Pattern 4: code followed by description and fee
-            r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+\.?\d*)',
-            # Pattern 5: code with description containing numbers
-            r'([A-Z]\d{3,4})\s+([A-Za-z\s,\.]+?)\s+(\d+)',
-            # Pattern 6: simple code and fee
-            r'([A-Z]\d{3,4})\s+(\d+\.?\d*)',
-        ]
-        
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
+        for line in text.split('\n'):
             line = line.strip()
-            if not line:
+            codes = [m.start() for m in CODE_RE.finditer(line)]
+            if not codes:
                 continue
+            candidates = []
+            for pattern_index, pattern in enumerate(SERVICE_PATTERNS):
+                for position in codes:
+                    match = pattern.match(line, position)
+                    if match:
+                        candidates.append((pattern_index, position, match.groups()))
+            candidates.sort(key=lambda c: (c[0], c[1]))
+            
+            for _, _, groups in candidates:
+                if len(groups) == 3:
+                    code, name, fee_str = groups
+                else:
+                    code, fee_str = groups
+                    name = code  # Use code as name if no name found
                 
-            for pattern in service_patterns:
-                matches = re.findall(pattern, line)
-                for match in matches:
-                    if len(match) == 3:
-                        code, name, fee_str = match
-                    elif len(match) == 2:
-                        code, fee_str = match
-                        name = code  # Use code as name if no name found
-                    else:
-                        continue
-                    
-                    # Clean data
-                    code = code.strip()
-                    name = name.strip()
-                    fee_str = fee_str.replace('$', '').strip()
-                    
-                    # Skip if code is too short or invalid
-                    if len(code) < 3 or not code[0].isalpha():
+                code = code.strip()
+                if code in seen:
+                    continue
+                name = name.strip()
+                try:
+                    fee = float(fee_str.replace('$', '').strip())
+                    # Skip if fee is too small (likely not a real fee)
+                    if fee < 1.0:
                         continue
-                    
-                    try:
-                        fee = float(fee_str)
-                        # Skip if fee is too small (likely not a real fee)
-                        if fee < 1.0:
-                            continue
-                    except ValueError:
-                        fee = 0.0
-                    
-                    # Check if service with same code already exists
-                    if not any(s.code == code for s in services):
-                        service = ServiceItem(
-                            code=code,
-                            name=name,
-                            description=name,  # Initial description same as name
-                            fee=fee,
-                            category=self._categorize_service(code, name),
-                            billing_constraints=[],
-                            page_number=page_num,
-                            section=self.current_section
-                        )
-                        services.append(service)
+                except ValueError:
+                    fee = 0.0
+                
+                seen.add(code)
+                services.append(ServiceItem(
+                    code=code,
+                    name=name,
+                    description=name,  # Initial description same as name
+                    fee=fee,
+                    category=self._categorize_service(code, name),
+                    billing_constraints=[],
+                    page_number=page_num,
+                    section=self.current_section if section is None else section
+                ))
         
         return services
     
-    def _extract_rules_from_text(self, text: str, page_num: int) -> List[BillingRule]:
-        """Extract billing rules from text"""
+    def _extract_rules_from_text(self, text: str, page_num: int,
+                                 section: Optional[str] = None) -> List[BillingRule]:
+        """Extract billing rules from text
+
+        Each sentence is tested once against the combined rule keyword
+        scanner and, if it matches, becomes exactly one rule.
+        """
         rules = []
+        seen = set()
         
-        # Enhanced rule patterns based on actual PDF content
-        rule_patterns = [
-            # Eligibility rules
-            r'([^.]*(?:is only eligible for payment if|is not eligible for payment when|not eligible for payment)[^.]*\.)',
-            # Service restrictions
-            r'([^.]*(?:cannot|can\'t|not allowed|prohibited|restricted|excluded|no more than|not to be billed)[^.]*\.)',
-            # Time-based rules
-            r'([^.]*(?:same day|concurrent|simultaneous|within|during|on the same|in the same)[^.]*\.)',
-            # Conditional rules
-            r'([^.]*(?:if|when|provided|subject to|conditional|unless|except)[^.]*\.)',
-            # Billing instructions
-            r'([^.]*(?:submit claims|claims submission|bill|billing|claim|report|document)[^.]*\.)',
-            # Service restrictions
-            r'([^.]*(?:not covered|not eligible|not payable|not reimbursed)[^.]*\.)',
-            # Fee adjustments
-            r'([^.]*(?:reduce.*fee|increase.*fee|adjust.*fee|fee.*reduced|fee.*increased)[^.]*\.)',
-            # Special conditions
-            r'([^.]*(?:special|additional|extra|premium|bonus|add|plus)[^.]*\.)',
-            # Administrative rules
-            r'([^.]*(?:must|should|required|mandatory|obligatory)[^.]*\.)',
-            # Service combinations
-            r'([^.]*(?:when rendered with|in combination with|together with)[^.]*\.)',
-            # Time requirements
-            r'([^.]*(?:minimum.*minutes|at least.*minutes|spend.*minutes)[^.]*\.)',
-            # Documentation requirements
-            r'([^.]*(?:recorded in|documented in|permanent medical record)[^.]*\.)',
-        ]
-        
-        sentences = re.split(r'[.!?]', text)
-        rule_id_counter = 1
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) < 10:  # Reduced minimum length
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            sentence = ' '.join(sentence.split())
+            if len(sentence) < 10 or sentence in seen or not RULE_KEYWORD_RE.search(sentence):
                 continue
-                
-            for pattern in rule_patterns:
-                matches = re.findall(pattern, sentence, re.IGNORECASE)
-                for match in matches:
-                    if match and len(match.strip()) > 8:  # Ensure match has meaningful content
-                        # Extract related service codes
-                        affected_codes = re.findall(r'[A-Z]\d{3,4}', match)
-                        
-                        rule = BillingRule(
-                            rule_id=f"RULE_{page_num}_{rule_id_counter}",
-                            rule_type=self._classify_rule_type(match),
-                            description=match,
-                            affected_codes=affected_codes,
-                            conditions=self._extract_conditions(match),
-                            page_number=page_num,
-                            section=self.current_section
-                        )
-                        rules.append(rule)
-                        rule_id_counter += 1
+            seen.add(sentence)
+            description = sentence if sentence[-1] in '.!?' else sentence + '.'
+            rules.append(BillingRule(
+                rule_id=f"RULE_{page_num}_{len(rules) + 1}",
+                rule_type=self._classify_rule_type(description),
+                description=description,
+                # Extract related service codes
+                affected_codes=list(dict.fromkeys(CODE_RE.findall(description))),
+                conditions=self._extract_conditions(description),
+                page_number=page_num,
+                section=self.current_section if section is None else section
+            ))
         
         return rules
     
@@ -302,6 +590,11 @@ class PDFServiceExtractor:
             json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"Data saved to: {output_file}")
     
+    def save_to_parquet(self, data: Dict[str, Any], output_dir: str):
+        """Save extracted data to typed Parquet files (see extraction_store)"""
+        for kind, path in write_parquet(data, output_dir).items():
+            print(f"{kind.capitalize()} saved to: {path}")
+    
     def save_to_csv(self, data: Dict[str, Any], output_dir: str):
         """Save extracted data to CSV files"""
         import pandas as pd
@@ -322,24 +615,60 @@ class PDFServiceExtractor:
 
 def main():
     """Main function"""
-    # Configuration parameters
-    pdf_path = "../../Ohip Benefits.pdf"  # Path relative to backend/scripts directory
-    output_dir = "../extracted_data"
+    parser = argparse.ArgumentParser(description="Extract OHIP services and billing rules from the Schedule of Benefits PDF")
+    # Paths default to running from the backend/scripts directory
+    parser.add_argument("--pdf", default="../../Ohip Benefits.pdf", help="Schedule of Benefits PDF")
+    parser.add_argument("--output-dir", default="../extracted_data", help="Directory for JSON/CSV output")
+    parser.add_argument("--start-page", type=int, default=1, help="First page to extract (1-based)")
+    parser.add_argument("--end-page", type=int, default=400, help="Last page to extract")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Extraction processes (1 = sequential, default: CPU count)")
+    parser.add_argument("--page-cache", default=DEFAULT_CACHE_PATH,
+                        help="SQLite cache of parsed page text, reused across runs and PDF releases")
+    parser.add_argument("--no-page-cache", action="store_true", help="Parse every page, ignoring the page cache")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help="PDF text backend (see benchmark_pdf_backends.py)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint in the output directory")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="Pages between checkpoint writes")
+    parser.add_argument("--pages", help="Only re-extract these pages (e.g. 12-15,40) and merge them into "
+                                        "the existing JSON output")
+    parser.add_argument("--no-csv", action="store_true", help="Skip writing services.csv / rules.csv")
+    args = parser.parse_args()
+    
+    pdf_path = args.pdf
+    output_dir = args.output_dir
     
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
     # Initialize extractor
-    extractor = PDFServiceExtractor(pdf_path)
+    extractor = PDFServiceExtractor(pdf_path, cache_path=None if args.no_page_cache else args.page_cache,
+                                    backend=args.backend)
+    
+    json_file = os.path.join(output_dir, "extracted_services_and_rules.json")
+    checkpoint_file = os.path.join(output_dir, "extraction_checkpoint.jsonl")
     
-    # Extract data (extract more pages to find rules)
     print("Starting PDF data extraction...")
-    data = extractor.extract_services_and_rules(start_page=1, end_page=400)  # Extract first 400 pages
+    if args.pages:
+        existing = None
+        if os.path.exists(json_file):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        data = extractor.extract_pages(parse_page_ranges(args.pages), existing, workers=args.workers)
+    else:
+        # Extract data (extract more pages to find rules)
+        data = extractor.extract_services_and_rules(start_page=args.start_page, end_page=args.end_page,
+                                                    workers=args.workers, checkpoint_path=checkpoint_file,
+                                                    resume=args.resume, checkpoint_every=args.checkpoint_every)
     
     # Save data
-    json_file = "../extracted_data/extracted_services_and_rules.json"
     extractor.save_to_json(data, json_file)
-    extractor.save_to_csv(data, output_dir)
+    extractor.save_to_parquet(data, output_dir)
+    if not args.no_csv:
+        extractor.save_to_csv(data, output_dir)
+    if not args.pages:
+        ExtractionCheckpoint(checkpoint_file, {}).remove()
     
     # Print statistics
     print("\n=== Extraction Statistics ===")
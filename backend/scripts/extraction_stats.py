@@ -0,0 +1,43 @@
+import argparse
+import os
+
+import pyarrow.compute as pc
+
+from extraction_store import RULES_FILE, SERVICES_FILE, read_table
+
+
+def main():
+    """Summarize extracted services and rules straight from the Parquet columns"""
+    parser = argparse.ArgumentParser(description="Statistics over extract_services_from_pdf.py Parquet output.")
+    parser.add_argument("--data-dir", default="../extracted_data", help="Directory with services/rules.parquet")
+    parser.add_argument("--top", type=int, default=10, help="Rows per ranking")
+    args = parser.parse_args()
+
+    # Only the columns each statistic needs are read from disk
+    services = read_table(os.path.join(args.data_dir, SERVICES_FILE), columns=["category", "fee", "page_number"])
+    rules = read_table(os.path.join(args.data_dir, RULES_FILE), columns=["rule_type", "affected_codes"])
+
+    print(f"=== Services ({services.num_rows}) ===")
+    fees = services.column("fee")
+    print(f"Fee: min ${pc.min(fees).as_py():.2f}, median ${pc.approximate_median(fees).as_py():.2f}, "
+          f"max ${pc.max(fees).as_py():.2f}" if services.num_rows else "No services")
+    print(f"Pages with services: {len(pc.unique(services.column('page_number')))}")
+    by_category = services.group_by("category").aggregate([("fee", "count"), ("fee", "mean")])
+    by_category = by_category.sort_by([("fee_count", "descending")])
+    for row in by_category.slice(0, args.top).to_pylist():
+        print(f"  {row['category']:<15} {row['fee_count']:>6} services, mean fee ${row['fee_mean']:.2f}")
+
+    print(f"\n=== Rules ({rules.num_rows}) ===")
+    by_type = rules.group_by("rule_type").aggregate([("rule_type", "count")])
+    for row in by_type.sort_by([("rule_type_count", "descending")]).to_pylist():
+        print(f"  {row['rule_type']:<15} {row['rule_type_count']:>6}")
+    codes = pc.list_flatten(rules.column("affected_codes"))
+    if len(codes):
+        print("Most referenced codes:")
+        counts = pc.value_counts(codes).to_pylist()
+        for item in sorted(counts, key=lambda c: -c["counts"])[:args.top]:
+            print(f"  {item['values']:<8} {item['counts']:>6} rules")
+
+
+if __name__ == "__main__":
+    main()
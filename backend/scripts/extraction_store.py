@@ -0,0 +1,66 @@
+"""Columnar (Parquet) storage for extracted services and rules.
+
+``services.parquet`` and ``rules.parquet`` hold one row per item with typed
+columns (fees as float64, page numbers as int32, constraints/codes as list
+columns). Readers memory-map the files and only decode the columns they ask
+for, instead of parsing the whole JSON dump.
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SERVICES_FILE = "services.parquet"
+RULES_FILE = "rules.parquet"
+
+SERVICE_SCHEMA = pa.schema([
+    ("code", pa.string()),
+    ("name", pa.string()),
+    ("description", pa.string()),
+    ("fee", pa.float64()),
+    ("category", pa.string()),
+    ("billing_constraints", pa.list_(pa.string())),
+    ("page_number", pa.int32()),
+    ("section", pa.string()),
+    ("notes", pa.string()),
+])
+
+RULE_SCHEMA = pa.schema([
+    ("rule_id", pa.string()),
+    ("rule_type", pa.string()),
+    ("description", pa.string()),
+    ("affected_codes", pa.list_(pa.string())),
+    ("conditions", pa.list_(pa.string())),
+    ("page_number", pa.int32()),
+    ("section", pa.string()),
+])
+
+
+def _write(records: List[Dict[str, Any]], schema: pa.Schema, path: str):
+    table = pa.Table.from_pylist([{name: record.get(name) for name in schema.names} for record in records],
+                                 schema=schema)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def write_parquet(data: Dict[str, Any], output_dir: str) -> Dict[str, str]:
+    """Write the ``services``/``rules`` of an extraction result; returns the file paths"""
+    paths = {"services": os.path.join(output_dir, SERVICES_FILE), "rules": os.path.join(output_dir, RULES_FILE)}
+    _write(data.get("services", []), SERVICE_SCHEMA, paths["services"])
+    _write(data.get("rules", []), RULE_SCHEMA, paths["rules"])
+    return paths
+
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Memory-mapped read of only the requested columns"""
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def iter_records(path: str, columns: Optional[List[str]] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Rows as dicts, decoded one record batch at a time"""
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield from batch.to_pylist()
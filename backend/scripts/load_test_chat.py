@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+
+base_dir = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(os.path.join(base_dir, '..'))
+
+
+class FakeAssistant:
+    """Stand-in for extract_fields_from_assistant that blocks like an assistant run"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, user_message, chat_history=None, collected=None, trace=None, earlier=None):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.running -= 1
+        return '{"patientName": "Test Patient"}', {"patientName": "Test Patient"}
+
+
+def offline_client(latency: float):
+    """ASGI client for main.app with the assistant replaced by a FakeAssistant"""
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    os.environ.setdefault("PINECONE_API_KEY", "offline")
+    import main
+
+    fake = FakeAssistant(latency)
+    main.extract_fields_from_assistant = fake
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=None)
+    return client, fake
+
+
+async def run_load(client: httpx.AsyncClient, requests: int, concurrency: int, message: str):
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"message": f"{message} #{i}", "chat_history": []})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def main():
+    """Fire concurrent /chat requests and report whether they overlap or serialize"""
+    parser = argparse.ArgumentParser(description="Concurrent /chat load test.")
+    parser.add_argument("--url", help="Running API (e.g. http://localhost:3034); omit for the offline in-process app")
+    parser.add_argument("--requests", type=int, default=32, help="Total /chat requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="Offline mode: seconds each fake assistant run blocks")
+    parser.add_argument("--message", default="General assessment for a new patient")
+    args = parser.parse_args()
+
+    async def run():
+        if args.url:
+            client, fake = httpx.AsyncClient(base_url=args.url, timeout=None), None
+        else:
+            client, fake = offline_client(args.latency)
+        async with client:
+            return fake, await run_load(client, args.requests, args.concurrency, args.message)
+
+    fake, (elapsed, latencies, errors) = asyncio.run(run())
+    latencies.sort()
+    print(f"=== /chat load test ({args.requests} requests, concurrency {args.concurrency}) ===")
+    print(f"Wall time: {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s), errors: {errors}")
+    print(f"Latency: p50 {statistics.median(latencies):.2f}s, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.2f}s, max {latencies[-1]:.2f}s")
+    if fake:
+        serialized = args.requests * args.latency
+        print(f"Serialized handling would take {serialized:.2f}s; "
+              f"peak concurrent assistant runs: {fake.peak} ({serialized / elapsed:.1f}x overlap)")
+
+
+if __name__ == "__main__":
+    main()
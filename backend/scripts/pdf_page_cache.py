@@ -0,0 +1,187 @@
+"""Disk cache of per-page PDF text and table layout.
+
+Parsing pages (with pdfplumber in particular) is by far the slowest part of
+extraction, so the parsed output is kept in SQLite keyed by ``(page hash, backend, kind)``.
+A page hash covers the page's content streams, form XObjects, font names and
+media box; it is computed with pdfminer's object parser, which is cheap next
+to layout analysis. ``(PDF file hash, page number) -> page hash`` is cached as
+well, so re-running on the same file does not even hash pages, and a new
+release of the PDF only re-parses the pages whose content changed.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import PDFStream, resolve1
+
+from pdf_text_backends import DEFAULT_BACKEND, PDFTextBackend, open_backend
+
+DEFAULT_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   '..', 'extracted_data', 'page_cache.sqlite3'))
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _page_hash(page: PDFPage) -> str:
+    digest = hashlib.sha256(repr(page.mediabox).encode())
+    for stream in page.contents:
+        digest.update(resolve1(stream).get_data())
+    resources = resolve1(page.resources) or {}
+    fonts = resolve1(resources.get('Font')) or {}
+    for name in sorted(fonts):
+        font = resolve1(fonts[name]) or {}
+        digest.update(f"{name}={font.get('BaseFont')}".encode())
+    xobjects = resolve1(resources.get('XObject')) or {}
+    for name in sorted(xobjects):
+        xobject = resolve1(xobjects[name])
+        # Forms can hold the page's text/tables; images don't affect extraction
+        subtype = resolve1(xobject.get('Subtype')) if isinstance(xobject, PDFStream) else None
+        if getattr(subtype, 'name', None) == 'Form':
+            digest.update(name.encode())
+            digest.update(xobject.get_data())
+    return digest.hexdigest()
+
+
+def compute_page_hashes(pdf_path: str) -> List[str]:
+    """Content hash of every page, in page order"""
+    with open(pdf_path, 'rb') as f:
+        document = PDFDocument(PDFParser(f))
+        return [_page_hash(page) for page in PDFPage.create_pages(document)]
+
+
+class PageCache:
+    """SQLite store of page hashes per PDF and parsed output per page hash"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " pdf_hash TEXT NOT NULL, page_number INTEGER NOT NULL, page_hash TEXT NOT NULL,"
+            " PRIMARY KEY (pdf_hash, page_number))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " page_hash TEXT NOT NULL, backend TEXT NOT NULL, kind TEXT NOT NULL, content TEXT NOT NULL,"
+            " PRIMARY KEY (page_hash, backend, kind))"
+        )
+        self._db.commit()
+
+    def page_hashes(self, pdf_path: str, pdf_hash: Optional[str] = None) -> List[str]:
+        """Page hashes of a PDF, computed once per distinct file"""
+        pdf_hash = pdf_hash or file_hash(pdf_path)
+        rows = self._db.execute(
+            "SELECT page_hash FROM documents WHERE pdf_hash = ? ORDER BY page_number", (pdf_hash,)
+        ).fetchall()
+        if rows:
+            return [row[0] for row in rows]
+        hashes = compute_page_hashes(pdf_path)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO documents (pdf_hash, page_number, page_hash) VALUES (?, ?, ?)",
+            [(pdf_hash, number, page_hash) for number, page_hash in enumerate(hashes, start=1)],
+        )
+        self._db.commit()
+        return hashes
+
+    def get(self, page_hash: str, backend: str, kind: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT content FROM pages WHERE page_hash = ? AND backend = ? AND kind = ?", (page_hash, backend, kind)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, page_hash: str, backend: str, kind: str, content: str):
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages (page_hash, backend, kind, content) VALUES (?, ?, ?, ?)",
+            (page_hash, backend, kind, content),
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class CachedPDF:
+    """Page text/tables of one PDF, parsed by a text backend only on cache misses.
+
+    Use as a context manager (closing also closes ``cache``); ``cache=None``
+    disables caching. ``hits`` and ``misses`` count page lookups.
+    """
+
+    def __init__(self, pdf_path: str, cache: Optional[PageCache] = None, page_hashes: Optional[List[str]] = None,
+                 backend: str = DEFAULT_BACKEND):
+        self.pdf_path = pdf_path
+        self.cache = cache
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._source: Optional[PDFTextBackend] = None
+        self.page_hashes = page_hashes
+        if cache is not None and page_hashes is None:
+            self.page_hashes = cache.page_hashes(pdf_path)
+
+    def __enter__(self) -> "CachedPDF":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def __len__(self) -> int:
+        if self.page_hashes is not None:
+            return len(self.page_hashes)
+        return len(self._open())
+
+    def _open(self) -> PDFTextBackend:
+        if self._source is None:
+            self._source = open_backend(self.backend, self.pdf_path)
+        return self._source
+
+    def _cached(self, page_num: int, kind: str, parse) -> str:
+        if self.cache is None:
+            return parse(page_num)
+        page_hash = self.page_hashes[page_num - 1]
+        content = self.cache.get(page_hash, self.backend, kind)
+        if content is not None:
+            self.hits += 1
+            return content
+        self.misses += 1
+        content = parse(page_num)
+        self.cache.put(page_hash, self.backend, kind, content)
+        return content
+
+    def _parse_tables(self, page_num: int) -> str:
+        source = self._open()
+        if not hasattr(source, "tables"):
+            raise ValueError(f"PDF text backend '{self.backend}' does not extract tables")
+        return json.dumps(source.tables(page_num), ensure_ascii=False)
+
+    def text(self, page_num: int) -> str:
+        """Text of a 1-based page"""
+        return self._cached(page_num, "text", lambda n: self._open().text(n))
+
+    def tables(self, page_num: int) -> List[List[List[Any]]]:
+        """Tables (rows of cell strings) of a 1-based page"""
+        return json.loads(self._cached(page_num, "tables", self._parse_tables))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
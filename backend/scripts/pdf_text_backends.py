@@ -0,0 +1,157 @@
+"""Interchangeable PDF page text backends for the extractor.
+
+Every backend opens one PDF and returns the text of 1-based pages with one
+line per text line, which is what the service/rule scanner expects:
+
+- ``pdfplumber``: pdfminer layout analysis via pdfplumber (reference, slowest)
+- ``pdfium``: PDFium's native text extraction via pypdfium2 (fastest)
+- ``pdfminer``: pdfminer without layout analysis; characters are grouped
+  into lines by baseline only
+- ``pypdf2``: PyPDF2's content stream text extraction
+
+Use ``scripts/benchmark_pdf_backends.py`` to compare speed and yield.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Type
+
+DEFAULT_BACKEND = "pdfplumber"
+
+
+class PDFTextBackend(ABC):
+    """Base class: page count, page text and cleanup"""
+
+    name = ""
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of pages"""
+
+    @abstractmethod
+    def text(self, page_num: int) -> str:
+        """Text of a 1-based page, one line per text line"""
+
+    def close(self):
+        pass
+
+
+class PdfplumberBackend(PDFTextBackend):
+    name = "pdfplumber"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pdfplumber
+        self._pdf = pdfplumber.open(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self._pdf.pages)
+
+    def text(self, page_num: int) -> str:
+        page = self._pdf.pages[page_num - 1]
+        text = page.extract_text() or ""
+        page.close()  # pdfplumber otherwise keeps every parsed page alive
+        return text
+
+    def tables(self, page_num: int) -> List[List[List[str]]]:
+        page = self._pdf.pages[page_num - 1]
+        tables = page.extract_tables()
+        page.close()
+        return tables
+
+    def close(self):
+        self._pdf.close()
+
+
+class PdfiumBackend(PDFTextBackend):
+    name = "pdfium"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pypdfium2
+        self._pdf = pypdfium2.PdfDocument(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self._pdf)
+
+    def text(self, page_num: int) -> str:
+        page = self._pdf[page_num - 1]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range()
+        textpage.close()
+        page.close()
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def close(self):
+        self._pdf.close()
+
+
+class PdfminerBackend(PDFTextBackend):
+    name = "pdfminer"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        from pdfminer.converter import PDFPageAggregator
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        self._file = open(pdf_path, 'rb')
+        self._pages = list(PDFPage.get_pages(self._file))
+        resources = PDFResourceManager(caching=True)
+        # laparams=None skips layout analysis: the page result is a flat list of characters
+        self._device = PDFPageAggregator(resources, laparams=None)
+        self._interpreter = PDFPageInterpreter(resources, self._device)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def text(self, page_num: int) -> str:
+        from pdfminer.layout import LTChar
+        self._interpreter.process_page(self._pages[page_num - 1])
+        lines: Dict[int, list] = {}
+        for item in self._device.get_result():
+            if isinstance(item, LTChar):
+                lines.setdefault(round(item.y0), []).append(item)
+
+        text_lines = []
+        for _, chars in sorted(lines.items(), key=lambda line: -line[0]):
+            chars.sort(key=lambda c: c.x0)
+            parts = [chars[0].get_text()]
+            for previous, char in zip(chars, chars[1:]):
+                # Insert the space that PDFs often leave implicit as a gap
+                if char.x0 - previous.x1 > 0.25 * previous.size and not (
+                        char.get_text().isspace() or previous.get_text().isspace()):
+                    parts.append(" ")
+                parts.append(char.get_text())
+            text_lines.append("".join(parts))
+        return "\n".join(text_lines)
+
+    def close(self):
+        self._file.close()
+
+
+class PyPDF2Backend(PDFTextBackend):
+    name = "pypdf2"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        from PyPDF2 import PdfReader
+        self._reader = PdfReader(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self._reader.pages)
+
+    def text(self, page_num: int) -> str:
+        return self._reader.pages[page_num - 1].extract_text() or ""
+
+
+BACKENDS: Dict[str, Type[PDFTextBackend]] = {
+    backend.name: backend for backend in (PdfplumberBackend, PdfiumBackend, PdfminerBackend, PyPDF2Backend)
+}
+
+
+def open_backend(name: str, pdf_path: str) -> PDFTextBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF text backend '{name}' (available: {', '.join(BACKENDS)})")
+    return BACKENDS[name](pdf_path)
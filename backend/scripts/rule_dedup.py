@@ -0,0 +1,156 @@
+"""Near-duplicate billing rule collapsing with MinHash LSH.
+
+The Schedule of Benefits repeats the same restriction on many pages with
+only the codes changed ("... not eligible for payment when rendered with
+A007 ..."). Rules are shingled into word 3-grams with billing codes replaced
+by a placeholder, MinHash signatures are banded into LSH buckets to find
+candidate pairs, and candidates whose estimated Jaccard similarity reaches
+the threshold are clustered with union-find. Each cluster is uploaded as one
+representative rule carrying the union of the cluster's affected codes and
+page numbers. ``RuleDeduplicator`` does the same filtering for a stream of
+rules without holding them.
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+CODE_RE = re.compile(r'\b[A-Z]\d{3,4}\b')
+WORD_RE = re.compile(r'[a-z0-9<>]+')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word n-grams of a rule with billing codes masked out"""
+    words = WORD_RE.findall(CODE_RE.sub(' <code> ', text).lower())
+    if len(words) < size:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes (a * x + b) mod p over 32-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[str]) -> np.ndarray:
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+             for s in shingle_set],
+            dtype=np.uint64,
+        )
+        # uint64 products wrap around; that only perturbs the hash family
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=1)
+
+
+def cluster_rules(rules: List[Dict[str, Any]], threshold: float = 0.8, num_perm: int = 128,
+                  bands: int = 16) -> List[List[int]]:
+    """Indices of near-duplicate rules grouped into clusters, in first-seen order"""
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    signatures = [hasher.signature(shingles(rule['description'])) for rule in rules]
+
+    parent = list(range(len(rules)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, signature in enumerate(signatures):
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for position, j in enumerate(members):
+            for i in members[:position]:
+                if find(i) == find(j):
+                    break
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                # Fraction of equal MinHash values estimates the Jaccard similarity
+                if np.mean(signatures[i] == signatures[j]) >= threshold:
+                    parent[find(j)] = find(i)
+                    break
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(rules)):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+class RuleDeduplicator:
+    """Streaming near-duplicate filter for rules that arrive one at a time.
+
+    Only the first rule of each cluster is kept; later rules are compared
+    with the kept representatives through the same LSH banding. Memory grows
+    with the number of distinct rules (one signature each), not with the
+    number of rules seen. Unlike ``collapse_rules`` a representative is
+    passed on as soon as it appears, so it carries only its own codes and
+    page.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hasher = MinHasher(num_perm)
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[tuple, List[int]] = defaultdict(list)
+        self.seen = 0
+
+    def add(self, rule: Dict[str, Any]) -> bool:
+        """True if ``rule`` starts a new cluster (and becomes its representative)"""
+        self.seen += 1
+        signature = self._hasher.signature(shingles(rule['description']))
+        keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+        candidates = {i for key in keys for i in self._buckets.get(key, ())}
+        if any(np.mean(self._signatures[i] == signature) >= self.threshold for i in candidates):
+            return False
+        for key in keys:
+            self._buckets[key].append(len(self._signatures))
+        self._signatures.append(signature)
+        return True
+
+    @property
+    def kept(self) -> int:
+        return len(self._signatures)
+
+
+def collapse_rules(rules: List[Dict[str, Any]], threshold: float = 0.8) -> List[Dict[str, Any]]:
+    """One representative rule per near-duplicate cluster.
+
+    The representative is the cluster's most frequent description (earliest
+    on ties). Its ``affected_codes`` become the union over the cluster,
+    ``page_numbers`` lists every page the rule appeared on and
+    ``duplicate_count`` the cluster size.
+    """
+    collapsed = []
+    for members in cluster_rules(rules, threshold):
+        counts = Counter(' '.join(rules[i]['description'].split()) for i in members)
+        best = max(members, key=lambda i: (counts[' '.join(rules[i]['description'].split())], -i))
+        representative = dict(rules[best])
+        representative['affected_codes'] = list(dict.fromkeys(
+            code for i in members for code in rules[i].get('affected_codes', [])
+        ))
+        representative['page_numbers'] = sorted({
+            page for i in members for page in rules[i].get('page_numbers', [rules[i].get('page_number', 0)])
+        })
+        representative['duplicate_count'] = sum(rules[i].get('duplicate_count', 1) for i in members)
+        collapsed.append(representative)
+    return collapsed
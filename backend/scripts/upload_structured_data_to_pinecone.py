@@ -1,7 +1,17 @@
+import argparse
 import json
 import os
-import uuid
-from typing import List, Dict, Any
+import random
+import sys
+import tempfile
+import time
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from dotenv import load_dotenv
 from pinecone import Pinecone, ServerlessSpec
 from openai import OpenAI
@@ -11,17 +21,66 @@ base_dir = os.path.abspath(os.path.dirname(__file__))
 env_path = os.path.join(base_dir, '..', '.env')  # Go up one directory to backend
 load_dotenv(env_path)
 
+# Allow importing the backend services package when run from backend/scripts
+sys.path.append(os.path.join(base_dir, '..'))
+from services.embedding_cache import get_embedding_cache, openai_embed_fn
+from services.local_vector_store import LocalVectorStore, load_local_vector_store, vector_store_backend
+from services.offline_clients import FAKE_EMBEDDING_MODEL, FakeEmbeddingsClient, LatencyIndex
+from extraction_store import RULES_FILE, SERVICES_FILE, iter_records
+from pdf_text_backends import BACKENDS, DEFAULT_BACKEND
+from rule_dedup import RuleDeduplicator, collapse_rules
+
+# Parquet columns read by upload_from_parquet
+SERVICE_UPLOAD_COLUMNS = ["code", "name", "description", "fee", "category", "billing_constraints",
+                          "page_number", "section", "notes"]
+RULE_UPLOAD_COLUMNS = ["rule_id", "rule_type", "description", "affected_codes", "conditions",
+                       "page_number", "section"]
+# Extraction-order ordinals that content_hash ignores
+UNHASHED_METADATA = {"rule_id", "page_number", "page_numbers"}
+
 class StructuredDataUploader:
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    def __init__(self, batch_size: int = 100, concurrency: int = 4, max_retries: int = 5,
+                 openai_client=None, index=None, embedding_model: str = "text-embedding-ada-002",
+                 manifest_path: str = None, rule_dedup_threshold: Optional[float] = 0.8):
+        self.openai_client = openai_client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.embedding_model = embedding_model
+        self.embedding_cache = get_embedding_cache()
         self.index_name = os.getenv("PINECONE_INDEX_NAME", "medical-bills")
+        self.local = vector_store_backend() == "local"
+        
+        # Content hashes of what is in the index, so syncs only touch changes
+        self.manifest_path = manifest_path or os.path.join(
+            base_dir, '..', 'extracted_data',
+            f"index_manifest_{'local' if self.local or index is not None else self.index_name}.json"
+        )
+        
+        # Pipeline tuning: vectors per embedding request / upsert (Pinecone
+        # batch upload limit is 100), embedding requests in flight, retries
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_base_delay = 1.0
+        
+        # Estimated Jaccard similarity above which rules are merged (None keeps every rule)
+        self.rule_dedup_threshold = rule_dedup_threshold
+        
+        if index is not None:
+            self.pc = None
+            self.index = index
+            return
+        
+        self.pc = None if self.local else Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
         
         # Ensure index exists
         self._ensure_index_exists()
         
     def _ensure_index_exists(self):
         """Ensure Pinecone index exists"""
+        if self.local:
+            self.index = load_local_vector_store()
+            print(f"Using local vector store: {self.index.path}")
+            return
+        
         if self.index_name not in self.pc.list_indexes().names():
             print(f"Creating index: {self.index_name}")
             self.pc.create_index(
@@ -39,12 +98,12 @@ class StructuredDataUploader:
         self.index = self.pc.Index(self.index_name)
     
     def get_embedding(self, text: str) -> List[float]:
-        """Get text embedding"""
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
+        """Get text embedding (cached on disk, so re-uploads skip unchanged texts)"""
+        return self.embedding_cache.embed(
+            self.embedding_model,
+            [text],
+            openai_embed_fn(self.openai_client, self.embedding_model)
+        )[0]
     
     def create_service_embedding_text(self, service: Dict[str, Any]) -> str:
         """Create embedding text for service item"""
@@ -73,8 +132,9 @@ class StructuredDataUploader:
     
     def create_rule_embedding_text(self, rule: Dict[str, Any]) -> str:
         """Create embedding text for rule"""
+        # The extraction-order rule_id is left out so re-extracting the PDF
+        # does not change the text (and force a re-embed) of unchanged rules
         text_parts = [
-            f"Rule ID: {rule['rule_id']}",
             f"Rule Type: {rule['rule_type']}",
             f"Description: {rule['description']}"
         ]
@@ -95,120 +155,323 @@ class StructuredDataUploader:
         
         return " | ".join(text_parts)
     
-    def upload_services(self, services: List[Dict[str, Any]]) -> int:
-        """Upload service items to Pinecone"""
-        print(f"Starting upload of {len(services)} service items...")
-        
-        uploaded_count = 0
-        batch_size = 100  # Pinecone batch upload limit
-        
-        for i in range(0, len(services), batch_size):
-            batch = services[i:i + batch_size]
-            vectors = []
-            
-            for service in batch:
-                # Create embedding text
-                embedding_text = self.create_service_embedding_text(service)
-                
-                # Get embedding
-                embedding = self.get_embedding(embedding_text)
-                
-                # Prepare metadata
-                metadata = {
-                    "type": "service",
-                    "code": service['code'],
-                    "name": service['name'],
-                    "description": service['description'],
-                    "fee": service['fee'],
-                    "category": service['category'],
-                    "section": service.get('section', ''),
-                    "page_number": service.get('page_number', 0),
-                    "text": embedding_text,
-                    "billing_constraints": json.dumps(service.get('billing_constraints', [])),
-                    "notes": service.get('notes', '')
-                }
-                
-                vectors.append({
-                    "id": f"service_{service['code']}_{uuid.uuid4().hex[:8]}",
-                    "values": embedding,
-                    "metadata": metadata
-                })
-            
-            # Batch upload
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one request (cache misses only), with retries"""
+        embed_fn = openai_embed_fn(self.openai_client, self.embedding_model)
+        return self._with_retries(
+            "Embedding request",
+            lambda: self.embedding_cache.embed(self.embedding_model, texts, embed_fn)
+        )
+    
+    def _with_retries(self, description: str, fn):
+        """Call fn, retrying failures with exponential backoff and jitter"""
+        for attempt in range(self.max_retries + 1):
             try:
-                self.index.upsert(vectors=vectors)
-                uploaded_count += len(batch)
-                print(f"Uploaded {uploaded_count}/{len(services)} service items")
+                return fn()
             except Exception as e:
-                print(f"Batch upload failed: {e}")
-                # Try individual upload
-                for vector in vectors:
-                    try:
-                        self.index.upsert(vectors=[vector])
-                        uploaded_count += 1
-                    except Exception as e2:
-                        print(f"Individual upload failed {vector['id']}: {e2}")
-        
-        print(f"Service items upload completed: {uploaded_count}/{len(services)}")
-        return uploaded_count
+                if attempt == self.max_retries:
+                    raise
+                delay = min(self.retry_base_delay * 2 ** attempt, 30.0) * (0.5 + random.random() / 2)
+                print(f"{description} failed ({e}); retrying in {delay:.1f}s "
+                      f"[{attempt + 1}/{self.max_retries}]")
+                time.sleep(delay)
     
-    def upload_rules(self, rules: List[Dict[str, Any]]) -> int:
-        """Upload rules to Pinecone"""
-        print(f"Starting upload of {len(rules)} rules...")
+    def _upsert_batch(self, vectors: List[Dict[str, Any]]) -> List[str]:
+        """Upsert one batch and return the ids that made it.
         
-        uploaded_count = 0
-        batch_size = 100
+        Falls back to per-vector upserts if the batch keeps failing.
+        """
+        try:
+            self._with_retries("Batch upload", lambda: self.index.upsert(vectors=vectors))
+            return [vector['id'] for vector in vectors]
+        except Exception as e:
+            print(f"Batch upload failed: {e}")
+            uploaded = []
+            for vector in vectors:
+                try:
+                    self.index.upsert(vectors=[vector])
+                    uploaded.append(vector['id'])
+                except Exception as e2:
+                    print(f"Individual upload failed {vector['id']}: {e2}")
+            return uploaded
+    
+    def _batches(self, entries: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Cut an entry stream into upload batches, pulling from it lazily"""
+        entries = iter(entries)
+        while True:
+            batch = list(islice(entries, self.batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    def _upload_entries(self, entries: Iterable[Dict[str, Any]], label: str) -> List[str]:
+        """Embed and upsert entries ({id, text, metadata}) in batches, returning uploaded ids.
+        
+        Up to `concurrency` multi-input embedding requests are in flight while a
+        separate worker upserts finished batches, so embedding batch N+1
+        overlaps the upsert of batch N. `entries` may be a generator: it is
+        only consumed one batch ahead of the embedding requests, so memory
+        stays bounded and the first vectors land before the stream ends.
+        """
+        total = len(entries) if hasattr(entries, '__len__') else None
+        print(f"Starting upload of {total if total is not None else 'streamed'} {label}...")
+        of_total = f"/{total}" if total is not None else ""
         
-        for i in range(0, len(rules), batch_size):
-            batch = rules[i:i + batch_size]
-            vectors = []
+        uploaded_ids = []
+        started = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as embed_pool, \
+                ThreadPoolExecutor(max_workers=1) as upsert_pool:
+            embedding_jobs = deque()
+            upsert_jobs = deque()
+            remaining = self._batches(entries)
+            
+            def submit_next_embedding():
+                batch = next(remaining, None)
+                if batch is not None:
+                    texts = [entry['text'] for entry in batch]
+                    embedding_jobs.append((batch, embed_pool.submit(self.embed_texts, texts)))
             
-            for rule in batch:
-                # Create embedding text
-                embedding_text = self.create_rule_embedding_text(rule)
-                
-                # Get embedding
-                embedding = self.get_embedding(embedding_text)
-                
-                # Prepare metadata
-                metadata = {
-                    "type": "rule",
-                    "rule_id": rule['rule_id'],
-                    "rule_type": rule['rule_type'],
-                    "description": rule['description'],
-                    "section": rule.get('section', ''),
-                    "page_number": rule.get('page_number', 0),
-                    "text": embedding_text,
-                    "affected_codes": json.dumps(rule.get('affected_codes', [])),
-                    "conditions": json.dumps(rule.get('conditions', []))
-                }
-                
-                vectors.append({
-                    "id": f"rule_{rule['rule_id']}_{uuid.uuid4().hex[:8]}",
-                    "values": embedding,
-                    "metadata": metadata
-                })
+            def collect_upsert():
+                uploaded_ids.extend(upsert_jobs.popleft().result())
+                elapsed = time.perf_counter() - started
+                print(f"Uploaded {len(uploaded_ids)}{of_total} {label} "
+                      f"({len(uploaded_ids) / elapsed if elapsed else 0:.1f} items/s)")
             
-            # Batch upload
+            for _ in range(self.concurrency):
+                submit_next_embedding()
+            
+            while embedding_jobs:
+                batch, job = embedding_jobs.popleft()
+                submit_next_embedding()
+                try:
+                    embeddings = job.result()
+                except Exception as e:
+                    print(f"Embedding failed for {len(batch)} {label}, skipping batch: {e}")
+                    continue
+                vectors = [{"id": entry['id'], "values": embedding, "metadata": entry['metadata']}
+                           for entry, embedding in zip(batch, embeddings)]
+                upsert_jobs.append(upsert_pool.submit(self._upsert_batch, vectors))
+                # Bound the number of embedded-but-not-upserted batches held in memory
+                while len(upsert_jobs) > self.concurrency:
+                    collect_upsert()
+            
+            while upsert_jobs:
+                collect_upsert()
+        
+        elapsed = time.perf_counter() - started
+        print(f"{label.capitalize()} upload completed: {len(uploaded_ids)}{of_total} "
+              f"in {elapsed:.1f}s ({len(uploaded_ids) / elapsed if elapsed else 0:.1f} items/s)")
+        return uploaded_ids
+    
+    @staticmethod
+    def service_vector_id(service: Dict[str, Any]) -> str:
+        """Deterministic vector id: one vector per billing code"""
+        return f"service_{service['code']}"
+    
+    @staticmethod
+    def rule_vector_id(rule: Dict[str, Any]) -> str:
+        """Deterministic vector id derived from the rule content"""
+        content = f"{rule['rule_type']}\x00{' '.join(rule['description'].split())}"
+        return f"rule_{hashlib.sha256(content.encode('utf-8')).hexdigest()[:20]}"
+    
+    def _service_entry(self, service: Dict[str, Any]) -> Dict[str, Any]:
+        """Vector id, embedding text and metadata for a service item"""
+        embedding_text = self.create_service_embedding_text(service)
+        metadata = {
+            "type": "service",
+            "code": service['code'],
+            "name": service['name'],
+            "description": service['description'],
+            "fee": service['fee'],
+            "category": service['category'],
+            "section": service.get('section', ''),
+            "page_number": service.get('page_number', 0),
+            "text": embedding_text,
+            "billing_constraints": json.dumps(service.get('billing_constraints', [])),
+            "notes": service.get('notes', '')
+        }
+        return {"id": self.service_vector_id(service), "text": embedding_text, "metadata": metadata}
+    
+    def _rule_entry(self, rule: Dict[str, Any]) -> Dict[str, Any]:
+        """Vector id, embedding text and metadata for a billing rule"""
+        embedding_text = self.create_rule_embedding_text(rule)
+        metadata = {
+            "type": "rule",
+            "rule_id": rule['rule_id'],
+            "rule_type": rule['rule_type'],
+            "description": rule['description'],
+            "section": rule.get('section', ''),
+            "page_number": rule.get('page_number', 0),
+            "text": embedding_text,
+            "affected_codes": json.dumps(rule.get('affected_codes', [])),
+            "conditions": json.dumps(rule.get('conditions', [])),
+            "page_numbers": json.dumps(rule.get('page_numbers', [rule.get('page_number', 0)])),
+            "duplicate_count": rule.get('duplicate_count', 1)
+        }
+        return {"id": self.rule_vector_id(rule), "text": embedding_text, "metadata": metadata}
+    
+    def content_hash(self, entry: Dict[str, Any]) -> str:
+        """Hash of the embedded text and the stable metadata of an entry.
+        
+        Extraction-order ordinals (rule_id, page numbers) are left out: one rule
+        inserted early in the PDF renumbers everything after it, and that alone
+        should not re-embed and re-upsert those vectors.
+        """
+        metadata = {k: v for k, v in entry['metadata'].items() if k not in UNHASHED_METADATA}
+        payload = json.dumps({"model": self.embedding_model, "text": entry['text'], "metadata": metadata},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def upload_services(self, services: List[Dict[str, Any]]) -> int:
+        """Upload service items to Pinecone"""
+        return len(self._upload_entries([self._service_entry(s) for s in services], "service items"))
+    
+    def upload_rules(self, rules: List[Dict[str, Any]]) -> int:
+        """Upload rules to Pinecone"""
+        return len(self._upload_entries([self._rule_entry(r) for r in rules], "rules"))
+    
+    def load_manifest(self) -> Dict[str, str]:
+        """{vector id: content hash} of what the last sync put in the index"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('vectors', {})
+    
+    def save_manifest(self, vectors: Dict[str, str]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "index": self.index_name,
+                "embedding_model": self.embedding_model,
+                "updated": datetime.now().isoformat(),
+                "vectors": vectors
+            }, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _untracked_ids(self, desired: Dict[str, Any]) -> List[str]:
+        """Ids in the index that this sync does not own (e.g. legacy service_<code>_<uuid> vectors)"""
+        untracked = []
+        for prefix in ("service_", "rule_"):
+            for ids in self.index.list(prefix=prefix):
+                untracked.extend(i for i in ids if i not in desired)
+        return untracked
+    
+    def _delete_ids(self, ids: List[str]) -> List[str]:
+        deleted = []
+        for i in range(0, len(ids), 1000):
+            chunk = ids[i:i + 1000]
             try:
-                self.index.upsert(vectors=vectors)
-                uploaded_count += len(batch)
-                print(f"Uploaded {uploaded_count}/{len(rules)} rules")
+                self._with_retries("Delete", lambda: self.index.delete(ids=chunk))
+                deleted.extend(chunk)
             except Exception as e:
-                print(f"Batch upload failed: {e}")
-                # Try individual upload
-                for vector in vectors:
-                    try:
-                        self.index.upsert(vectors=[vector])
-                        uploaded_count += 1
-                    except Exception as e2:
-                        print(f"Individual upload failed {vector['id']}: {e2}")
-        
-        print(f"Rules upload completed: {uploaded_count}/{len(rules)}")
-        return uploaded_count
-    
-    def upload_from_json(self, json_file: str) -> Dict[str, int]:
-        """Upload data from JSON file"""
+                print(f"Delete failed for {len(chunk)} vectors: {e}")
+        return deleted
+    
+    def collapse_rules(self, rules: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge near-duplicate rules (see rule_dedup) so each cluster is embedded once"""
+        rules = list(rules)
+        if self.rule_dedup_threshold is None or not rules:
+            return rules
+        collapsed = collapse_rules(rules, self.rule_dedup_threshold)
+        print(f"Rule dedup: {len(rules)} rules -> {len(collapsed)} after collapsing near-duplicates "
+              f"(threshold {self.rule_dedup_threshold})")
+        return collapsed
+    
+    def _entries(self, services: Iterable[Dict[str, Any]], rules: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for service in services:
+            yield self._service_entry(service)
+        for rule in self.collapse_rules(rules):
+            yield self._rule_entry(rule)
+    
+    def sync(self, services: Iterable[Dict[str, Any]], rules: Iterable[Dict[str, Any]],
+             dry_run: bool = False, prune_untracked: bool = False) -> Dict[str, Any]:
+        """Make the index match the extracted data, touching only what changed"""
+        return self.sync_entries(self._entries(services, rules), dry_run=dry_run, prune_untracked=prune_untracked)
+    
+    def sync_entries(self, entries: Iterable[Dict[str, Any]], dry_run: bool = False,
+                     prune_untracked: bool = False, delete_missing: bool = True) -> Dict[str, Any]:
+        """Sync a stream of entries against the manifest.
+        
+        Entries are diffed against the manifest as they arrive; new and changed
+        ones flow straight into the embed/upsert pipeline. Once the stream is
+        exhausted, manifest ids that were not seen are deleted and the manifest
+        is updated with what succeeded. Only ids and hashes are kept per item.
+        With ``delete_missing=False`` (a stream that covers only part of the
+        data) nothing is deleted.
+        """
+        manifest = self.load_manifest()
+        seen: Dict[str, str] = {}
+        changes = {"new": [], "changed": []}
+        duplicates = 0
+        
+        def pending() -> Iterator[Dict[str, Any]]:
+            nonlocal duplicates
+            for entry in entries:
+                if entry['id'] in seen:
+                    duplicates += 1  # same code / identical rule text seen earlier
+                    continue
+                entry['hash'] = self.content_hash(entry)
+                seen[entry['id']] = entry['hash']
+                previous = manifest.get(entry['id'])
+                if previous == entry['hash']:
+                    continue
+                changes["new" if previous is None else "changed"].append(entry['id'])
+                yield entry
+        
+        if dry_run:
+            for _ in pending():
+                pass
+            uploaded = []
+        else:
+            uploaded = self._upload_entries(pending(), "items")
+        
+        if delete_missing:
+            to_delete = [i for i in manifest if i not in seen]
+            if prune_untracked:
+                to_delete += [i for i in self._untracked_ids(seen) if i not in manifest]
+        else:
+            to_delete = []
+            print(f"Delete phase skipped: only part of the data was synced "
+                  f"({sum(1 for i in manifest if i not in seen)} manifest vectors not seen are kept)")
+        
+        added, changed = len(changes["new"]), len(changes["changed"])
+        print(f"Sync: {added} new, {changed} changed, {len(to_delete)} to delete, "
+              f"{len(seen) - added - changed} unchanged"
+              + (f" ({duplicates} duplicate items skipped)" if duplicates else ""))
+        
+        result = {
+            "added": added,
+            "changed": changed,
+            "deleted": 0,
+            "unchanged": len(seen) - added - changed,
+            "services_uploaded": sum(1 for i in uploaded if i.startswith("service_")),
+            "rules_uploaded": sum(1 for i in uploaded if i.startswith("rule_")),
+            "total_uploaded": len(uploaded)
+        }
+        if dry_run:
+            for label, ids in (("new", changes["new"]), ("changed", changes["changed"]), ("delete", to_delete)):
+                for vector_id in ids[:10]:
+                    print(f"  {label}: {vector_id}")
+                if len(ids) > 10:
+                    print(f"  ... {len(ids) - 10} more {label}")
+            result["dry_run"] = True
+            result["deleted"] = len(to_delete)
+            return result
+        
+        deleted = set(self._delete_ids(to_delete)) if to_delete else set()
+        manifest = {i: h for i, h in manifest.items() if i not in deleted}
+        manifest.update({i: seen[i] for i in uploaded})
+        self.save_manifest(manifest)
+        if hasattr(self.index, "save"):
+            self.index.save()
+        
+        result["deleted"] = len(deleted)
+        return result
+    
+    def upload_from_json(self, json_file: str, dry_run: bool = False, prune_untracked: bool = False) -> Dict[str, Any]:
+        """Sync the index with a JSON extraction file"""
         print(f"Loading data from file: {json_file}")
         
         with open(json_file, 'r', encoding='utf-8') as f:
@@ -219,17 +482,61 @@ class StructuredDataUploader:
         
         print(f"Loaded {len(services)} service items and {len(rules)} rules")
         
-        # Upload service items
-        services_uploaded = self.upload_services(services)
+        return self.sync(services, rules, dry_run=dry_run, prune_untracked=prune_untracked)
+    
+    def upload_from_parquet(self, directory: str, dry_run: bool = False,
+                            prune_untracked: bool = False) -> Dict[str, Any]:
+        """Sync the index with the Parquet output of extract_services_from_pdf.py.
         
-        # Upload rules
-        rules_uploaded = self.upload_rules(rules)
+        Only the columns the index needs are read, memory-mapped and decoded
+        a record batch at a time; services stream straight into the sync.
+        """
+        services_path = os.path.join(directory, SERVICES_FILE)
+        rules_path = os.path.join(directory, RULES_FILE)
+        print(f"Loading data from: {services_path}, {rules_path}")
         
-        return {
-            "services_uploaded": services_uploaded,
-            "rules_uploaded": rules_uploaded,
-            "total_uploaded": services_uploaded + rules_uploaded
-        }
+        services = iter_records(services_path, columns=SERVICE_UPLOAD_COLUMNS, batch_size=self.batch_size * 10)
+        rules = iter_records(rules_path, columns=RULE_UPLOAD_COLUMNS, batch_size=self.batch_size * 10)
+        return self.sync(services, rules, dry_run=dry_run, prune_untracked=prune_untracked)
+    
+    def upload_from_pdf(self, pdf_path: str, start_page: int = 1, end_page: int = None, workers: int = 1,
+                        dry_run: bool = False, prune_untracked: bool = False,
+                        page_cache: Optional[str] = None, backend: str = DEFAULT_BACKEND) -> Dict[str, Any]:
+        """Stream pages straight from the PDF through extraction, embedding and upsert.
+        
+        A page range that does not cover the whole PDF only adds and updates
+        vectors; the delete phase is skipped, since the items of the other
+        pages were not streamed.
+        
+        No intermediate JSON is written and extracted items are not kept, so
+        memory stays flat however large the PDF is. Near-duplicate rules are
+        filtered as they stream (see ``RuleDeduplicator``): the first rule of
+        each cluster is embedded right away with its own codes and page, and
+        only one MinHash signature per distinct rule is kept. `page_cache`
+        is the page text cache used by the extractor (None parses every page)
+        and `backend` its PDF text backend.
+        """
+        from extract_services_from_pdf import PDFServiceExtractor
+        
+        extractor = PDFServiceExtractor(pdf_path, cache_path=page_cache, backend=backend)
+        total_pages = extractor.page_range()[1]
+        whole_pdf = start_page <= 1 and (end_page is None or end_page >= total_pages)
+        
+        dedup = RuleDeduplicator(self.rule_dedup_threshold) if self.rule_dedup_threshold is not None else None
+        
+        def entries() -> Iterator[Dict[str, Any]]:
+            for page in extractor.iter_pages(start_page, end_page, workers):
+                for service in page.services:
+                    yield self._service_entry(asdict(service))
+                for rule in page.rules:
+                    if dedup is None or dedup.add(asdict(rule)):
+                        yield self._rule_entry(asdict(rule))
+            if dedup is not None and dedup.seen:
+                print(f"Rule dedup: {dedup.seen} rules -> {dedup.kept} after dropping near-duplicates "
+                      f"(threshold {dedup.threshold})")
+        
+        return self.sync_entries(entries(), dry_run=dry_run, prune_untracked=prune_untracked,
+                                 delete_missing=whole_pdf)
     
     def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
@@ -243,16 +550,70 @@ class StructuredDataUploader:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Embed extracted services/rules and upload them to the vector index.")
+    parser.add_argument("--json-file", default="../extracted_data/extracted_services_and_rules.json")
+    parser.add_argument("--parquet-dir", help="Read services.parquet / rules.parquet from this directory "
+                                              "instead of --json-file")
+    parser.add_argument("--pdf", help="Stream straight from the Schedule of Benefits PDF instead of --json-file")
+    parser.add_argument("--start-page", type=int, default=1,
+                        help="First PDF page to extract (with --pdf; a partial range skips deletions)")
+    parser.add_argument("--end-page", type=int,
+                        help="Last PDF page to extract (with --pdf, default: last page; a partial range "
+                             "skips deletions)")
+    parser.add_argument("--workers", type=int, default=1, help="PDF extraction processes (with --pdf)")
+    parser.add_argument("--pdf-backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help="PDF text backend for --pdf (see benchmark_pdf_backends.py)")
+    parser.add_argument("--no-page-cache", action="store_true",
+                        help="Parse every PDF page instead of reusing the extractor's page text cache")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("UPLOAD_BATCH_SIZE", "100")),
+                        help="Texts per embedding request and vectors per upsert")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("UPLOAD_CONCURRENCY", "4")),
+                        help="Embedding requests in flight")
+    parser.add_argument("--max-retries", type=int, default=int(os.getenv("UPLOAD_MAX_RETRIES", "5")))
+    parser.add_argument("--fake", action="store_true",
+                        help="Offline run: fake embeddings endpoint and a throwaway local vector store")
+    parser.add_argument("--fake-latency", type=float, default=0.0,
+                        help="Simulated seconds per embedding/upsert call in --fake mode")
+    parser.add_argument("--fake-store", help="Directory for the --fake vector store (reuse it to test re-syncs)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what a sync would add/change/delete")
+    parser.add_argument("--prune-untracked", action="store_true",
+                        help="Also delete service_/rule_ vectors not in the manifest (e.g. old random-id uploads)")
+    parser.add_argument("--rule-dedup-threshold", type=float, default=0.8,
+                        help="Merge rules whose estimated Jaccard similarity is at least this")
+    parser.add_argument("--no-rule-dedup", action="store_true", help="Upload every extracted rule as is")
+    parser.add_argument("--manifest", help="Manifest path (default: extracted_data/index_manifest_<index>.json)")
+    args = parser.parse_args()
+    
     # Configuration parameters
-    json_file = "../extracted_data/extracted_services_and_rules.json"
+    json_file = args.json_file
     
-    if not os.path.exists(json_file):
+    if args.pdf and not os.path.exists(args.pdf):
+        print(f"Error: File not found {args.pdf}")
+        return
+    if args.parquet_dir and not os.path.exists(os.path.join(args.parquet_dir, SERVICES_FILE)):
+        print(f"Error: File not found {os.path.join(args.parquet_dir, SERVICES_FILE)}")
+        return
+    if not (args.pdf or args.parquet_dir) and not os.path.exists(json_file):
         print(f"Error: File not found {json_file}")
         print("Please run extract_services_from_pdf.py first to generate data file")
         return
     
     # Initialize uploader
-    uploader = StructuredDataUploader()
+    options = dict(batch_size=args.batch_size, concurrency=args.concurrency, max_retries=args.max_retries,
+                   manifest_path=args.manifest,
+                   rule_dedup_threshold=None if args.no_rule_dedup else args.rule_dedup_threshold)
+    if args.fake:
+        fake_store = LocalVectorStore(args.fake_store or tempfile.mkdtemp(prefix="fake_vector_store_"))
+        options["manifest_path"] = args.manifest or os.path.join(fake_store.path, "manifest.json")
+        uploader = StructuredDataUploader(
+            openai_client=FakeEmbeddingsClient(latency=args.fake_latency),
+            index=LatencyIndex(fake_store, latency=args.fake_latency),
+            embedding_model=FAKE_EMBEDDING_MODEL,
+            **options
+        )
+        print(f"Offline mode: fake embeddings, local store at {fake_store.path}")
+    else:
+        uploader = StructuredDataUploader(**options)
     
     # Get statistics before upload
     print("=== Statistics Before Upload ===")
@@ -261,19 +622,37 @@ def main():
     
     # Upload data
     print("\n=== Starting Data Upload ===")
-    upload_results = uploader.upload_from_json(json_file)
+    if args.parquet_dir:
+        upload_results = uploader.upload_from_parquet(args.parquet_dir, dry_run=args.dry_run,
+                                                      prune_untracked=args.prune_untracked)
+    elif args.pdf:
+        from pdf_page_cache import DEFAULT_CACHE_PATH
+        upload_results = uploader.upload_from_pdf(args.pdf, args.start_page, args.end_page, args.workers,
+                                                  dry_run=args.dry_run, prune_untracked=args.prune_untracked,
+                                                  page_cache=None if args.no_page_cache else DEFAULT_CACHE_PATH,
+                                                  backend=args.pdf_backend)
+    else:
+        upload_results = uploader.upload_from_json(json_file, dry_run=args.dry_run,
+                                                   prune_untracked=args.prune_untracked)
+    if args.dry_run:
+        return
     
     # Get statistics after upload
     print("\n=== Statistics After Upload ===")
     after_stats = uploader.get_index_stats()
     print(f"Current vector count: {after_stats['total_vector_count']}")
-    print(f"New vectors added: {after_stats['total_vector_count'] - before_stats['total_vector_count']}")
+    print(f"Net vector change: {after_stats['total_vector_count'] - before_stats['total_vector_count']}")
     
     # Print upload results
     print("\n=== Upload Results ===")
     print(f"Service items uploaded: {upload_results['services_uploaded']}")
     print(f"Rules uploaded: {upload_results['rules_uploaded']}")
     print(f"Total uploaded: {upload_results['total_uploaded']}")
+    print(f"Deleted: {upload_results['deleted']}, unchanged: {upload_results['unchanged']}")
+    
+    cache_stats = uploader.embedding_cache.stats()
+    print(f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.0%} hit rate)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Bounded thread pools for running blocking calls off the asyncio event loop.
+
+The OpenAI Assistants calls, embedding requests and Pinecone queries made by
+the API are synchronous. Endpoints hand them to a named pool with
+``run_blocking`` so a slow assistant run occupies one pool thread instead of
+the whole event loop. Each pool has a fixed number of threads (``CHAT_WORKERS``
+for the assistant, ``SEARCH_WORKERS`` for embedding/vector search); requests
+beyond that wait in the pool's queue. ``iterate_blocking`` does the same for
+a blocking iterator (e.g. streamed reply tokens), handing items back to the
+event loop as they are produced.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable
+
+CHAT_POOL = "chat"
+SEARCH_POOL = "search"
+
+POOL_SIZES = {
+    CHAT_POOL: int(os.getenv("CHAT_WORKERS", "16")),
+    SEARCH_POOL: int(os.getenv("SEARCH_WORKERS", "8")),
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_in_flight: Dict[str, int] = {}
+_lock = threading.Lock()
+_DONE = object()
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    """The named pool, created on first use"""
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=POOL_SIZES.get(name, 4), thread_name_prefix=f"{name}-pool")
+            _pools[name] = pool
+            _in_flight.setdefault(name, 0)
+        return pool
+
+
+def _track(name: str, fn: Callable[..., Any]) -> Any:
+    with _lock:
+        _in_flight[name] += 1
+    try:
+        return fn()
+    finally:
+        with _lock:
+            _in_flight[name] -= 1
+
+
+async def run_blocking(pool: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await ``fn(*args, **kwargs)`` executed on the named bounded pool"""
+    executor = get_pool(pool)
+    call = functools.partial(fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, _track, pool, call)
+
+
+async def iterate_blocking(pool: str, fn: Callable[..., Iterable[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+    """Async iteration over ``fn(*args, **kwargs)``, which is created and consumed on the named pool.
+
+    When the consumer stops early (e.g. the client disconnected) the worker
+    thread stops pulling items after the current one and closes the iterator
+    there, so a wrapped generator's ``finally``/``with`` blocks (an open HTTP
+    stream) run on the pool rather than whenever it is garbage collected.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def emit(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # Event loop already closed (server shutting down)
+            stopped.set()
+
+    def produce():
+        items = None
+        try:
+            items = fn(*args, **kwargs)
+            for item in items:
+                if stopped.is_set():
+                    break
+                emit(item)
+        except Exception as e:
+            emit(_DONE, e)
+        else:
+            emit(_DONE)
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    loop.run_in_executor(get_pool(pool), _track, pool, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Configured size and currently running calls per pool"""
+    with _lock:
+        return {name: {"workers": POOL_SIZES.get(name, 4), "in_flight": _in_flight.get(name, 0)}
+                for name in POOL_SIZES}
+
+
+def shutdown_pools(wait: bool = True):
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,22 @@
+"""LangChain ``Embeddings`` adapter over the shared embedding cache."""
+
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from services.embedding_cache import EmbeddingCache, get_embedding_cache
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` wrapper that consults the shared cache first"""
+
+    def __init__(self, embeddings, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or get_embedding_cache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed(self.model, texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cache.embed(self.model, [text], lambda texts: [self.embeddings.embed_query(texts[0])])[0]
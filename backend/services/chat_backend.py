@@ -0,0 +1,93 @@
+"""Chat backends that produce the assistant's reply for a billing conversation.
+
+``CHAT_BACKEND`` selects how a turn reaches OpenAI:
+
+- ``assistant``: the original Assistants flow (create thread, create run,
+  poll ``runs.retrieve`` every 0.5s, list messages);
+- ``assistant_stream``: the same Assistant in one streamed create-and-run
+  request;
+- ``completion``: one streamed Chat Completions request with ``CHAT_MODEL``.
+
+Every backend yields reply text deltas and by default goes through the
+shared client from ``services.clients``. The caller joins them and parses the
+bill info, so the output contract does not depend on the backend.
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.clients import get_openai_client
+
+CHAT_BACKENDS = ("assistant", "assistant_stream", "completion")
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "assistant")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-4o-mini")
+ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+
+POLL_INTERVAL = 0.5
+# Run statuses that end polling; every one but "completed" fails the turn
+# ("requires_action" too: this assistant has no tool outputs to submit)
+TERMINAL_RUN_STATUSES = {"completed", "failed", "cancelled", "expired", "incomplete", "requires_action"}
+
+
+def build_thread_messages(prompt: str, user_message: str,
+                          chat_history: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, str]]:
+    """Prompt first, then the user/assistant history, then the new message"""
+    messages = [{"role": "user", "content": prompt}]
+    for m in chat_history or []:
+        if m.get("role") in ("user", "assistant") and m.get("content"):
+            messages.append({"role": m["role"], "content": m["content"]})
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+def _assistant_poll(client, messages: List[Dict[str, str]]) -> Iterator[str]:
+    thread = client.beta.threads.create(messages=messages)
+    run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id=ASSISTANT_ID)
+    while True:
+        run_status = client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+        if run_status.status in TERMINAL_RUN_STATUSES:
+            break
+        time.sleep(POLL_INTERVAL)
+    if run_status.status != "completed":
+        raise Exception(f"OpenAI Assistant run {run_status.status}")
+    listed = client.beta.threads.messages.list(thread_id=thread.id)
+    for msg in listed.data:
+        if msg.role == "assistant":
+            yield msg.content[0].text.value
+            break
+
+
+def _assistant_stream(client, messages: List[Dict[str, str]]) -> Iterator[str]:
+    with client.beta.threads.create_and_run_stream(
+        assistant_id=ASSISTANT_ID, thread={"messages": messages}
+    ) as stream:
+        yield from stream.text_deltas
+        run = stream.current_run
+    if run is not None and run.status in TERMINAL_RUN_STATUSES - {"completed"}:
+        raise Exception(f"OpenAI Assistant run {run.status}")
+
+
+def _completion_stream(client, messages: List[Dict[str, str]]) -> Iterator[str]:
+    # Without an Assistant's instructions the prompt is the system message
+    messages = [{"role": "system", "content": messages[0]["content"]}] + messages[1:]
+    response = client.chat.completions.create(model=CHAT_MODEL, messages=messages, stream=True)
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+_BACKENDS = {
+    "assistant": _assistant_poll,
+    "assistant_stream": _assistant_stream,
+    "completion": _completion_stream,
+}
+
+
+def stream_reply(prompt: str, user_message: str, chat_history: Optional[List[Dict[str, Any]]] = None,
+                 backend: Optional[str] = None, client=None) -> Iterator[str]:
+    """Reply text deltas for one chat turn (``client`` defaults to the shared OpenAI client)"""
+    backend = backend or CHAT_BACKEND
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown CHAT_BACKEND '{backend}' (expected one of {', '.join(CHAT_BACKENDS)})")
+    return _BACKENDS[backend](client or get_openai_client(), build_thread_messages(prompt, user_message, chat_history))
@@ -0,0 +1,146 @@
+"""Server-side chat sessions so clients only send the new message each turn.
+
+A session holds the conversation history (trimmed to a token budget), the
+user messages trimmed off it (for the prompt's summary of earlier turns),
+the bill fields collected so far and a turn counter. Sessions live in an
+in-process LRU with TTL expiry by default; set ``CHAT_SESSION_STORE=redis``
+and ``REDIS_URL`` to share them between instances through any
+Redis-compatible server.
+
+- ``CHAT_SESSION_TTL_SECONDS``: idle time before a session expires;
+- ``CHAT_SESSION_MAX_ENTRIES``: in-process store size;
+- ``CHAT_SESSION_HISTORY_TOKENS``: token budget for the stored history;
+- ``CHAT_SESSION_EARLIER_MESSAGES``: trimmed-off user messages kept for the summary.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from services.result_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "7200"))
+SESSION_MAX_ENTRIES = int(os.getenv("CHAT_SESSION_MAX_ENTRIES", "5000"))
+HISTORY_TOKENS = int(os.getenv("CHAT_SESSION_HISTORY_TOKENS", "2000"))
+EARLIER_MESSAGES = int(os.getenv("CHAT_SESSION_EARLIER_MESSAGES", "50"))
+# Longer than a summary line (see prompt_builder.SUMMARY_LINE_CHARS), so nothing it shows is lost
+EARLIER_CHARS = 240
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def new_session(history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Empty session, optionally seeded with a client-supplied chat history"""
+    session = {"history": [], "earlier": [], "bill_info": {}, "turns": 0}
+    append_history(session, [{"role": m["role"], "content": m["content"]} for m in history or []
+                             if m.get("role") in ("user", "assistant") and m.get("content")])
+    return session
+
+
+def append_history(session: Dict[str, Any], messages: List[Dict[str, str]]):
+    """Add messages to the session history; user messages trimmed off it move to ``earlier``"""
+    history = session["history"] + messages
+    kept = trim_history(history)
+    dropped = [" ".join(m["content"].split())[:EARLIER_CHARS] for m in history[:len(history) - len(kept)]
+               if m["role"] == "user"]
+    # Sessions saved before "earlier" existed have none yet
+    session["earlier"] = (session.get("earlier", []) + dropped)[-EARLIER_MESSAGES:]
+    session["history"] = kept
+
+
+def trim_history(history: List[Dict[str, str]], max_tokens: int = HISTORY_TOKENS) -> List[Dict[str, str]]:
+    """Most recent messages that fit in ``max_tokens``, always starting with a user message"""
+    kept, used = [], 0
+    for message in reversed(history):
+        used += estimate_tokens(message["content"])
+        if used > max_tokens and kept:
+            break
+        kept.append(message)
+    kept.reverse()
+    while len(kept) > 1 and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
+
+
+def record_turn(session: Dict[str, Any], user_message: str, reply: str, bill_info: Dict[str, Any]):
+    """Append a turn to the session and merge the fields it collected"""
+    append_history(session, [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": reply},
+    ])
+    session["bill_info"].update({k: v for k, v in bill_info.items() if v not in (None, "", [])})
+    session["turns"] += 1
+
+
+class InMemorySessionStore:
+    """Sessions in a process-local LRU; each save restarts the TTL"""
+
+    def __init__(self, maxsize: int = SESSION_MAX_ENTRIES, ttl: float = SESSION_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(session_id)
+
+    def save(self, session_id: str, session: Dict[str, Any]):
+        self._cache.set(session_id, session)
+
+    def delete(self, session_id: str):
+        self._cache.delete(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisSessionStore:
+    """Sessions as JSON strings in a Redis-compatible server (requires the ``redis`` package)"""
+
+    def __init__(self, url: str, ttl: float = SESSION_TTL, prefix: str = "chat_session:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("CHAT_SESSION_STORE=redis requires the 'redis' package (pip install redis)") from e
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.get(self.prefix + session_id)
+        return json.loads(raw) if raw is not None else None
+
+    def save(self, session_id: str, session: Dict[str, Any]):
+        self._redis.set(self.prefix + session_id, json.dumps(session), ex=self.ttl)
+
+    def delete(self, session_id: str):
+        self._redis.delete(self.prefix + session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "ttl_seconds": self.ttl}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Process-wide store selected by CHAT_SESSION_STORE ("memory" or "redis")"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.getenv("CHAT_SESSION_STORE", "memory").lower() == "redis":
+                _store = RedisSessionStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+                logger.info("Chat sessions stored in Redis")
+            else:
+                _store = InMemorySessionStore()
+        return _store
+
+
+def create_session_id() -> str:
+    return uuid.uuid4().hex
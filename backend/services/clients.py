@@ -0,0 +1,140 @@
+"""Process-wide OpenAI and Pinecone clients with keep-alive connection pools.
+
+Every endpoint, ``EnhancedRAGService`` and the chat backends share one
+``OpenAI`` client (and its httpx connection pool), one ``Pinecone`` client and
+one ``Index`` handle instead of paying a TLS handshake per request. The SDKs
+are imported when a client is first requested, not when this module is. The
+app warms the clients at startup with ``warm_up_clients`` and closes them on
+shutdown with ``close_clients``.
+
+Pool sizes are tunable:
+
+- ``OPENAI_MAX_CONNECTIONS`` / ``OPENAI_KEEPALIVE_CONNECTIONS``: httpx limits
+  for the OpenAI client;
+- ``PINECONE_POOL_THREADS`` / ``PINECONE_CONNECTION_POOL_MAXSIZE``: the Index
+  handle's thread pool and urllib3 connection pool;
+- ``PINECONE_INDEX_HOST`` skips the control-plane lookup of the index host.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_KEEPALIVE_CONNECTIONS", "16"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+PINECONE_POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "8"))
+PINECONE_CONNECTION_POOL_MAXSIZE = int(os.getenv("PINECONE_CONNECTION_POOL_MAXSIZE", "16"))
+
+_clients: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def _get(name: str, factory):
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = factory()
+        return client
+
+
+def get_http_client() -> "httpx.Client":
+    """Keep-alive httpx pool behind every OpenAI client (including LangChain's embeddings)"""
+    def create():
+        import httpx
+        from openai import DefaultHttpxClient
+
+        return DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                max_keepalive_connections=OPENAI_KEEPALIVE_CONNECTIONS),
+            timeout=OPENAI_TIMEOUT,
+        )
+
+    return _get("http", create)
+
+
+def get_openai_client() -> "OpenAI":
+    def create():
+        from openai import OpenAI
+
+        return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=get_http_client())
+
+    return _get("openai", create)
+
+
+def get_pinecone_client():
+    def create():
+        from pinecone import Pinecone
+
+        return Pinecone(api_key=os.getenv("PINECONE_API_KEY"), pool_threads=PINECONE_POOL_THREADS)
+
+    return _get("pinecone", create)
+
+
+def get_pinecone_index():
+    """Shared Pinecone ``Index`` handle for ``PINECONE_INDEX_NAME``"""
+    def create():
+        return get_pinecone_client().Index(
+            name=os.getenv("PINECONE_INDEX_NAME", "medical-bills"),
+            host=os.getenv("PINECONE_INDEX_HOST", ""),
+            pool_threads=PINECONE_POOL_THREADS,
+            connection_pool_maxsize=PINECONE_CONNECTION_POOL_MAXSIZE,
+        )
+
+    return _get("index", create)
+
+
+def get_vector_index():
+    """Index for the configured backend: the local store or the shared Pinecone handle"""
+    from services.local_vector_store import load_local_vector_store, vector_store_backend
+
+    if vector_store_backend() == "local":
+        return load_local_vector_store()
+    return get_pinecone_index()
+
+
+def warm_up_clients() -> Dict[str, Any]:
+    """Open the OpenAI and vector index connections ahead of the first request.
+
+    Returns seconds taken (or the error) per client; failures are logged, not
+    raised, so the app still starts when a service is unreachable.
+    """
+    report: Dict[str, Any] = {}
+    checks = {
+        "openai": lambda: get_openai_client().with_options(max_retries=0).models.retrieve(EMBEDDING_MODEL),
+        "vector_index": lambda: get_vector_index().describe_index_stats(),
+    }
+    for name, check in checks.items():
+        started = time.perf_counter()
+        try:
+            check()
+            report[name] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            report[name] = {"error": str(e)}
+    logger.info(f"Client warm-up: {report}")
+    return report
+
+
+def close_clients():
+    """Close the shared connection pools; the next ``get_*`` call creates fresh clients"""
+    with _lock:
+        clients = dict(_clients)
+        _clients.clear()
+    if "openai" in clients:
+        clients["openai"].close()
+    if "http" in clients:
+        clients["http"].close()
+    index: Optional[Any] = clients.get("index")
+    if index is not None and hasattr(index, "close"):
+        index.close()
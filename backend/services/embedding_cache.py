@@ -0,0 +1,193 @@
+"""Persistent, content-addressed embedding cache.
+
+Embeddings are stored in SQLite keyed by ``(model, sha256(normalized text))``
+so the chat service, the search endpoints and the uploader all reuse each
+other's work across restarts. Entries are evicted least-recently-used once
+``EMBEDDING_CACHE_MAX_ENTRIES`` is exceeded; a small in-memory LRU sits in
+front of the database for hot queries. Set ``EMBEDDING_CACHE_PATH`` to move
+the database, or to an empty string to disable persistence.
+
+The LangChain wrapper lives in ``services.cached_embeddings`` so importing
+the cache does not pull in LangChain.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data", "embedding_cache.sqlite3"))
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC and collapsed whitespace; this is also the text that gets embedded"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def text_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU embedding cache with hit/miss counters"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_entries: int = 200_000,
+                 memory_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes_since_evict = 0
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL,"
+                    " last_used REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache at {path} unavailable, using memory only: {e}")
+                self._db = None
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """Cached vectors for ``texts``, keyed by cache key (misses are absent)"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            missing = []
+            for text in texts:
+                key = text_key(model, text)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                elif key not in found:
+                    missing.append(key)
+            if missing and self._db is not None:
+                now = time.time()
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                    if rows:
+                        self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                             [(now, key) for key, _ in rows])
+                self._db.commit()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        """Store ``{text: vector}`` pairs"""
+        with self._lock:
+            now = time.time()
+            rows = []
+            for text, vector in items.items():
+                key = text_key(model, text)
+                self._remember(key, list(vector))
+                rows.append((key, model, array("f", vector).tobytes(), now))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)", rows
+                )
+                self._db.commit()
+                self._writes_since_evict += len(rows)
+                if self._writes_since_evict >= max(1, self.max_entries // 100):
+                    self._evict()
+
+    def _evict(self):
+        self._writes_since_evict = 0
+        (count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self._db.commit()
+            logger.info(f"Evicted {count - self.max_entries} embeddings from cache")
+
+    def embed(self, model: str, texts: Sequence[str], embed_fn: EmbedFn) -> List[List[float]]:
+        """Embed ``texts`` with ``embed_fn``, calling it only for cache misses.
+
+        ``embed_fn`` receives the normalized, de-duplicated missing texts in
+        one batch and must return their vectors in order.
+        """
+        normalized = [normalize_text(t) for t in texts]
+        found = self.get_many(model, normalized)
+        keys = [text_key(model, t) for t in normalized]
+        missing = list(dict.fromkeys(t for t, k in zip(normalized, keys) if k not in found))
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        if missing:
+            vectors = embed_fn(missing)
+            self.put_many(model, dict(zip(missing, vectors)))
+            for text, vector in zip(missing, vectors):
+                found[text_key(model, text)] = list(vector)
+        return [found[k] for k in keys]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        entries = None
+        if self._db is not None:
+            with self._lock:
+                (entries,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries if entries is not None else len(self._memory),
+        }
+
+
+def openai_embed_fn(client, model: str) -> EmbedFn:
+    """Batch embedding function backed by an ``openai.OpenAI`` client"""
+    def embed(texts: List[str]) -> List[List[float]]:
+        response = client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+    return embed
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache configured from EMBEDDING_CACHE_PATH / EMBEDDING_CACHE_MAX_ENTRIES"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000")),
+            )
+        return _cache
@@ -1,9 +1,10 @@
 import os
+import json
+import threading
+import time
 from typing import List, Dict, Any, Optional
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from langchain.schema import Document
-from pinecone import Pinecone
+from services.clients import EMBEDDING_MODEL, get_http_client, get_pinecone_client, get_pinecone_index
+from services.result_cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,29 +16,112 @@ class EnhancedRAGService:
         self.api_key = os.getenv("PINECONE_API_KEY")
         self.environment = os.getenv("PINECONE_ENVIRONMENT", "us-east-1-aws")
         
-        # Initialize LangChain components
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-ada-002",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+        self.embedding_model = EMBEDDING_MODEL
+        self.service_filter = {"type": "service"}  # Only search service items
+        
+        # Results of repeated questions are served from memory until they expire
+        # or the catalog is reloaded
+        self.result_cache = TTLCache(
+            maxsize=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("RAG_CACHE_TTL_SECONDS", "3600"))
         )
         
-        # Initialize Pinecone
-        self.pinecone = Pinecone(api_key=self.api_key)
+        # LangChain and the vector store are set up on first use (or by the
+        # startup warm-up), so importing this module stays cheap
+        self.embeddings = None
+        self._vector_store = None
+        self._connected = False
+        self._connect_lock = threading.Lock()
+        # After a failed connect, queries skip the knowledge base until the retry time
+        self.retry_seconds = float(os.getenv("VECTOR_STORE_RETRY_SECONDS", "30"))
+        self._retry_at = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def vector_store(self):
+        if not self._connected and time.monotonic() >= self._retry_at:
+            with self._connect_lock:
+                if not self._connected and time.monotonic() >= self._retry_at:
+                    self._connect_vector_store()
+                    self._mark_connected()
+        return self._vector_store
+
+    def _mark_connected(self):
+        """Record the outcome of a connect attempt (caller holds the lock)"""
+        self._connected = self._vector_store is not None
+        self._retry_at = 0.0 if self._connected else time.monotonic() + self.retry_seconds
+
+    def _create_embeddings(self):
+        """LangChain embeddings through the shared on-disk cache and the app-wide OpenAI connection pool"""
+        from langchain_openai import OpenAIEmbeddings
+        from services.cached_embeddings import CachedEmbeddings
+        
+        return CachedEmbeddings(
+            OpenAIEmbeddings(
+                model=self.embedding_model,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=get_http_client()
+            ),
+            model=self.embedding_model
+        )
+
+    def _connect_vector_store(self, reload: bool = False):
+        """Create the vector store for the configured backend"""
+        from services.local_vector_store import load_local_vector_store, vector_store_backend
+        
+        if self.embeddings is None:
+            self.embeddings = self._create_embeddings()
+        # "pinecone" (default) or "local" (in-process store, see local_vector_store.py)
+        self.backend = vector_store_backend()
+        if self.backend == "local":
+            self.pinecone = None
+            self._vector_store = load_local_vector_store(embedding=self.embeddings, reload=reload)
+            logger.info(f"Using local vector store: {self._vector_store.path}")
+            return
         
         try:
-            # Initialize LangChain Pinecone VectorStore
-            self.vector_store = PineconeVectorStore(
-                index_name=self.index_name,
-                embedding=self.embeddings,
-                pinecone_api_key=self.api_key
+            from langchain_pinecone import PineconeVectorStore
+            
+            # LangChain Pinecone VectorStore over the app-wide client and Index handle
+            self.pinecone = get_pinecone_client()
+            self._vector_store = PineconeVectorStore(
+                index=get_pinecone_index(),
+                embedding=self.embeddings
             )
             logger.info(f"Connected to Pinecone index: {self.index_name}")
         except Exception as e:
             logger.error(f"Failed to connect to Pinecone: {e}")
-            self.vector_store = None
+            self._vector_store = None
+
+    def reload_catalog(self):
+        """Reconnect to the (re-uploaded) catalog and drop every cached result"""
+        with self._connect_lock:
+            self._connect_vector_store(reload=True)
+            self._mark_connected()
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        self.result_cache.clear()
+        logger.info("RAG result cache invalidated")
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.result_cache.stats()
+
+    @staticmethod
+    def _cache_key(kind: str, queries: List[str], top_k: int, filter: Dict[str, Any]) -> tuple:
+        normalized = tuple(" ".join(q.lower().split()) for q in queries)
+        return (kind, normalized, top_k, json.dumps(filter, sort_keys=True))
 
     def process_query(self, query: str, chat_history: Optional[List] = None, top_k: int = 3) -> Dict[str, Any]:
         """Process query using LangChain and return service information"""
+        cache_key = self._cache_key("process_query", [query], top_k, self.service_filter)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if not self.vector_store:
             return {
                 "context": "Knowledge base not available.",
@@ -50,15 +134,17 @@ class EnhancedRAGService:
             docs = self.vector_store.similarity_search(
                 query=query,
                 k=top_k,
-                filter={"type": "service"}  # Only search service items
+                filter=self.service_filter
             )
             
             if not docs:
-                return {
+                result = {
                     "context": "No matching service found in the knowledge base.",
                     "answer": "No matching service found.",
                     "type": "service_lookup"
                 }
+                self.result_cache.set(cache_key, result)
+                return result
             
             # Process top result
             top_doc = docs[0]
@@ -88,7 +174,7 @@ class EnhancedRAGService:
                 if alternatives:
                     context_text += f". Alternative services: {', '.join(alternatives[:2])}"
             
-            return {
+            result = {
                 "context": context_text,
                 "answer": f'{{"serviceCode": "{service_code}", "serviceName": "{service_name}", "amount": {service_fee}}}',
                 "type": "service_lookup",
@@ -102,6 +188,8 @@ class EnhancedRAGService:
                     } for doc in docs
                 ]
             }
+            self.result_cache.set(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error processing query '{query}': {e}")
@@ -116,6 +204,11 @@ class EnhancedRAGService:
         if not self.vector_store:
             return {"error": "Knowledge base not available"}
         
+        cache_key = self._cache_key("search_multiple_services", queries, top_k, self.service_filter)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         all_services = []
         for query in queries:
             result = self.process_query(query, top_k=top_k)
@@ -130,11 +223,13 @@ class EnhancedRAGService:
                 unique_services.append(service)
                 seen_codes.add(service["code"])
         
-        return {
+        result = {
             "services": unique_services,
             "total_found": len(unique_services),
             "queries_processed": len(queries)
         }
+        self.result_cache.set(cache_key, result)
+        return result
 
     def search_services(self, query, top_k=10):
         # Placeholder: Return mock services
@@ -0,0 +1,352 @@
+"""Compiled, normalized OHIP fee-schedule snapshot.
+
+The six ``data/dataset_schedule_of_benefits_*.csv`` exports all use different
+headers (and file 6 has none), so parsing them ad hoc drops most fees and
+repeats codes. ``build_snapshot`` merges them into one row per billing code
+and writes a columnar binary file that ``FeeSchedule`` opens with ``mmap``:
+every process maps the same read-only pages instead of re-parsing ~32k CSV
+lines at import time.
+
+Snapshot layout (little endian)::
+
+    b"OHIPFS01" | uint32 header length | JSON header | padding | columns
+
+String columns are ``uint32`` offsets (rows + 1) followed by a UTF-8 blob;
+fee columns are ``float64`` arrays with NaN for "no fee listed". Rows are
+sorted by code so the code column can be binary searched.
+"""
+
+import csv
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
+SNAPSHOT_FILENAME = "fee_schedule.snapshot"
+SOURCE_PREFIX = "dataset_schedule_of_benefits"
+
+MAGIC = b"OHIPFS01"
+FORMAT_VERSION = 1
+
+TEXT_FIELDS = ("code", "category", "sub_category", "sub_category_2", "description")
+FEE_FIELDS = (
+    "fee_provider",          # "$" / "Charge $" / "Charge $(provider)" / "Provider Fee"
+    "fee_technical",         # "T"
+    "fee_professional",      # "P"
+    "fee_p1",                # "P1"
+    "fee_hospital",          # "Charge(H)"
+    "fee_assistant",
+    "fee_specialist",
+    "fee_anaesthetist",
+    "fee_non_anaesthetist",
+)
+
+CODE_RE = re.compile(r"^[A-Z]\d{3}[A-Z]?$")
+FEE_RE = re.compile(r"^-?\d+(?:\.\d+)?$")
+
+# Column positions per export, keyed by the dataset number in the filename.
+# Earlier entries in SOURCE_PRIORITY win when several files list the same code.
+SOURCE_LAYOUTS = {
+    # dataset 1: Billing Code,Category,Description,Charge $,Charge T,Charge P,Charge P1
+    "1": {"code": 0, "category": 1, "description": 2,
+          "fee_provider": 3, "fee_technical": 4, "fee_professional": 5, "fee_p1": 6},
+    # dataset 2: ...,Description,Charge $(provider),Charge T,Charge P,Charge P1,Charge(H)
+    "2": {"code": 0, "category": 1, "sub_category": 2, "sub_category_2": 3, "description": 4,
+          "fee_provider": 5, "fee_technical": 6, "fee_professional": 7, "fee_p1": 8,
+          "fee_hospital": 9},
+    # dataset 3: the header lists Sub Category 2 before Description, but the
+    # rows are shifted left by one (description sits in column 3).
+    "3": {"code": 0, "category": 1, "sub_category": 2, "description": 3,
+          "fee_provider": 5, "fee_assistant": 6, "fee_specialist": 7,
+          "fee_anaesthetist": 8, "fee_non_anaesthetist": 9},
+    # datasets 4 and 5: CODE,Cat1,Cat2,Cat3,Cat4,Description,$,T,P,P1
+    "4": {"code": 0, "category": 1, "sub_category": 2, "sub_category_2": 3, "description": 5,
+          "fee_provider": 6, "fee_technical": 7, "fee_professional": 8, "fee_p1": 9},
+    "5": {"code": 0, "category": 1, "sub_category": 2, "sub_category_2": 3, "description": 5,
+          "fee_provider": 6, "fee_technical": 7, "fee_professional": 8, "fee_p1": 9},
+    # dataset 6 has no header row: code, description
+    "6": {"code": 0, "description": 1},
+}
+SOURCE_PRIORITY = ("2", "1", "4", "3", "5", "6")
+HEADER_CELLS = {"billing code", "code"}
+EMPTY_VALUES = {"not applicable", "n/a"}
+
+
+def normalize_code(value: str) -> str:
+    """Normalize a billing code ("f 005" -> "F005"); returns "" if invalid"""
+    code = re.sub(r"\s+", "", value or "").upper()
+    return code if CODE_RE.match(code) else ""
+
+
+def _parse_fee(value: str) -> float:
+    value = (value or "").replace("$", "").replace(",", "").strip()
+    return float(value) if FEE_RE.match(value) else math.nan
+
+
+def _source_files(data_dir: str) -> Dict[str, str]:
+    files = {}
+    for filename in os.listdir(data_dir):
+        match = re.match(rf"^{SOURCE_PREFIX}_(\d+)\.csv$", filename)
+        if match:
+            files[match.group(1)] = os.path.join(data_dir, filename)
+    return files
+
+
+def source_fingerprint(data_dir: str = DATA_DIR) -> List[List[Any]]:
+    """(name, size, mtime) of every source CSV, used to detect a stale snapshot"""
+    fingerprint = []
+    for key, path in sorted(_source_files(data_dir).items()):
+        stat = os.stat(path)
+        fingerprint.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def load_source_records(data_dir: str = DATA_DIR) -> List[Dict[str, Any]]:
+    """Parse and merge all source CSVs into one record per billing code.
+
+    For every field the first non-empty value wins, walking the files in
+    SOURCE_PRIORITY order and each file top to bottom.
+    """
+    files = _source_files(data_dir)
+    ordered = [k for k in SOURCE_PRIORITY if k in files]
+    ordered += sorted(k for k in files if k not in SOURCE_PRIORITY)
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for key in ordered:
+        layout = SOURCE_LAYOUTS.get(key)
+        if layout is None:
+            logger.warning(f"No layout for {files[key]}, skipping")
+            continue
+        with open(files[key], encoding="utf-8-sig", newline="") as f:
+            for row in csv.reader(f):
+                if not row or row[0].strip().lower() in HEADER_CELLS:
+                    continue
+                code = normalize_code(row[0])
+                if not code:
+                    continue
+                record = merged.get(code)
+                if record is None:
+                    record = {field: "" for field in TEXT_FIELDS}
+                    record.update({field: math.nan for field in FEE_FIELDS})
+                    record["code"] = code
+                    merged[code] = record
+                for field, col in layout.items():
+                    if field == "code" or col >= len(row):
+                        continue
+                    if field in FEE_FIELDS:
+                        if math.isnan(record[field]):
+                            record[field] = _parse_fee(row[col])
+                    elif not record[field]:
+                        value = " ".join(row[col].split())
+                        if value.lower() not in EMPTY_VALUES:
+                            record[field] = value
+    return [merged[code] for code in sorted(merged)]
+
+
+def _encode_str_column(values: Sequence[str]) -> bytes:
+    blobs = [v.encode("utf-8") for v in values]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(blobs)
+
+
+def build_snapshot(data_dir: str = DATA_DIR, output_path: Optional[str] = None) -> str:
+    """Compile the source CSVs into a snapshot file and return its path.
+
+    The file is written next to its destination and renamed into place, so
+    concurrently starting processes never map a half-written snapshot.
+    """
+    output_path = output_path or os.path.join(data_dir, SNAPSHOT_FILENAME)
+    records = load_source_records(data_dir)
+
+    columns = []
+    for field in TEXT_FIELDS:
+        columns.append((field, "str", _encode_str_column([r[field] for r in records])))
+    for field in FEE_FIELDS:
+        columns.append((field, "f64", struct.pack(f"<{len(records)}d", *(r[field] for r in records))))
+
+    # Column offsets are relative to the (8-byte aligned) end of the header.
+    layout, offset = {}, 0
+    for name, kind, payload in columns:
+        layout[name] = {"kind": kind, "offset": offset, "length": len(payload)}
+        offset = _align(offset + len(payload))
+    header = {"version": FORMAT_VERSION, "rows": len(records),
+              "sources": source_fingerprint(data_dir), "columns": layout}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".fee_schedule.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for name, _, payload in columns:
+                f.seek(data_start + layout[name]["offset"])
+                f.write(payload)
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    logger.info(f"Built fee schedule snapshot with {len(records)} codes: {output_path}")
+    return output_path
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class _StrColumn:
+    """Read-only view of an offsets + UTF-8 blob string column"""
+
+    def __init__(self, buf: memoryview, rows: int):
+        self.offsets = buf[:(rows + 1) * 4].cast("I")
+        self.blob = buf[(rows + 1) * 4:]
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def raw(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class FeeSchedule(Sequence):
+    """Memory-mapped view over a compiled fee-schedule snapshot.
+
+    Behaves as a read-only sequence of service dicts sorted by code, so it can
+    stand in for the lists the services used to build from the CSVs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a fee schedule snapshot: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._mmap[start:start + header_len]))
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')}")
+        self.rows = self.header["rows"]
+
+        if sys.byteorder != "little":
+            raise ValueError("Fee schedule snapshots are little endian only")
+        view = memoryview(self._mmap)[_align(start + header_len):]
+        self._text: Dict[str, _StrColumn] = {}
+        self._fees: Dict[str, memoryview] = {}
+        for name, col in self.header["columns"].items():
+            buf = view[col["offset"]:col["offset"] + col["length"]]
+            if col["kind"] == "str":
+                self._text[name] = _StrColumn(buf, self.rows)
+            else:
+                self._fees[name] = buf.cast("d")
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record(j) for j in range(*i.indices(self.rows))]
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        return self.record(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.rows):
+            yield self.record(i)
+
+    def code(self, i: int) -> str:
+        return self._text["code"][i]
+
+    def text(self, field: str, i: int) -> str:
+        return self._text[field][i]
+
+    def fee(self, field: str, i: int) -> Optional[float]:
+        value = self._fees[field][i]
+        return None if math.isnan(value) else value
+
+    def amount(self, i: int) -> Optional[float]:
+        """Billable amount: provider fee, else technical + professional components"""
+        provider = self.fee("fee_provider", i)
+        if provider is not None:
+            return provider
+        components = [self.fee(f, i) for f in ("fee_technical", "fee_professional")]
+        components = [c for c in components if c is not None]
+        return round(sum(components), 2) if components else provider
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Row ``i`` as a service dict (``code``/``description``/``amount`` plus every column)"""
+        record: Dict[str, Any] = {field: self._text[field][i] for field in TEXT_FIELDS}
+        record.update({field: self.fee(field, i) for field in FEE_FIELDS})
+        record["amount"] = self.amount(i)
+        return record
+
+    def is_stale(self, data_dir: str = DATA_DIR) -> bool:
+        return self.header.get("sources") != source_fingerprint(data_dir)
+
+    def close(self):
+        self._text.clear()
+        self._fees.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views handed out to callers still reference the mapping; it is
+            # released with the last of them.
+            pass
+
+
+_fee_schedule: Optional[FeeSchedule] = None
+_fee_schedule_key: Optional[str] = None
+
+
+def load_fee_schedule(data_dir: str = DATA_DIR, snapshot_path: Optional[str] = None) -> FeeSchedule:
+    """Open the shared fee-schedule snapshot, (re)building it if missing or stale.
+
+    Path can be overridden with FEE_SCHEDULE_SNAPSHOT. If the data directory
+    is read-only the snapshot is compiled to a temporary file instead.
+    """
+    global _fee_schedule, _fee_schedule_key
+    default_path = os.getenv("FEE_SCHEDULE_SNAPSHOT") or os.path.join(data_dir, SNAPSHOT_FILENAME)
+    path = snapshot_path or default_path
+    if _fee_schedule is not None and _fee_schedule_key == path:
+        return _fee_schedule
+    requested = path
+
+    schedule = None
+    if os.path.exists(path):
+        try:
+            schedule = FeeSchedule(path)
+            if schedule.is_stale(data_dir):
+                logger.info("Fee schedule snapshot is stale, rebuilding")
+                schedule.close()
+                schedule = None
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not open fee schedule snapshot {path}: {e}")
+            schedule = None
+    if schedule is None:
+        try:
+            build_snapshot(data_dir, path)
+        except OSError as e:
+            logger.warning(f"Could not write {path} ({e}); using a temporary snapshot")
+            path = build_snapshot(data_dir, os.path.join(tempfile.gettempdir(), SNAPSHOT_FILENAME))
+        schedule = FeeSchedule(path)
+
+    if snapshot_path is None:
+        _fee_schedule, _fee_schedule_key = schedule, requested
+    return schedule
@@ -0,0 +1,260 @@
+"""Deterministic extraction of bill fields from a chat message.
+
+Many turns only supply a patient name, an OHIP number, a date of service or
+a literal billing code. ``extract_fields`` parses those with regular
+expressions and resolves codes against the fee schedule; when nothing else
+is left in the message, the turn is answered locally with ``compose_reply``
+instead of a RAG lookup and an assistant run. Anything it cannot account for
+(free text, unknown codes, ambiguous dates) returns ``None`` so the turn goes
+to the LLM as before; ``split_message`` also exposes those leftover words.
+"""
+
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.fee_schedule import normalize_code
+
+MONTHS = {
+    name: i + 1
+    for i, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",),
+        ("june", "jun"), ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"),
+        ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ])
+    for name in names
+}
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+ISO_DATE_RE = re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b")
+MONTH_FIRST_RE = re.compile(rf"\b({_MONTH})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.IGNORECASE)
+DAY_FIRST_RE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH})\.?,?\s+(\d{{4}})\b", re.IGNORECASE)
+RELATIVE_DATE_RE = re.compile(r"\b(today|yesterday)\b", re.IGNORECASE)
+# Health number (10 digits, optionally grouped 4-3-3) and an optional 1-2 letter
+# version code, either attached ("1234567890AB", "1234-567-890-AB") or after a
+# "VC"/"version code" cue; a separate word like "OK" or "I" is never one
+OHIP_RE = re.compile(
+    r"\b(\d{4})[- ]?(\d{3})[- ]?(\d{3})"
+    r"(?:-?([A-Z]{1,2})|,?\s*(?:[Vv]ersion(?:\s+[Cc]ode)?|VC|vc)\s*(?::|is)?\s*([A-Za-z]{1,2}))?(?![\w-])"
+)
+CODE_RE = re.compile(r"\b[A-Za-z]\d{3}[A-Za-z]?\b")
+# Patient phrasing only: "my name is ..." introduces the user, not the patient
+NAME_CUE_RE = re.compile(
+    r"\b(?:(?:patient(?:'s)?|pt\.?)\s+name\s*(?:is|:)|name\s+of\s+(?:the\s+)?patient\s*(?:is|:)"
+    r"|pt\.?\s*:|patient\s*(?:is|:))\s*",
+    re.IGNORECASE,
+)
+NAME_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'\-]*")
+WORD_RE = re.compile(r"[A-Za-z']+|\d+")
+
+# Words that carry no information beyond the fields they introduce
+FILLER_WORDS = {
+    "a", "add", "also", "and", "bill", "billing", "card", "code", "codes", "date", "dos", "for", "health",
+    "hi", "hello", "hin", "i", "is", "it", "it's", "its", "my", "name", "number", "of", "ohip", "on",
+    "patient", "patient's", "please", "pt", "saw", "seen", "service", "services", "the", "their", "thanks",
+    "to", "use", "version", "vc", "was", "we", "with", "yes",
+}
+NAME_STOP_WORDS = FILLER_WORDS | {"an", "who", "he", "she", "they", "has", "had", "came", "today", "yesterday"}
+
+FIELD_LABELS = {
+    "patientName": "patient name",
+    "ohipNumber": "OHIP number",
+    "ohipVersionCode": "version code",
+    "serviceDate": "date of service",
+}
+NEXT_QUESTIONS = {
+    "patientName": "What is the patient's name?",
+    "ohipNumber": "What is the patient's OHIP number?",
+    "serviceDate": "What was the date of service?",
+}
+
+
+def _valid_date(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _blank(text: str, match: "re.Match") -> str:
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _extract_date(text: str, today: date):
+    """(YYYY-MM-DD or None, text with the date blanked, ambiguous flag)"""
+    match = ISO_DATE_RE.search(text)
+    if match:
+        return _valid_date(*map(int, match.groups())), _blank(text, match), False
+    match = MONTH_FIRST_RE.search(text)
+    if match:
+        month, day, year = MONTHS[match.group(1).lower()], int(match.group(2)), int(match.group(3))
+        return _valid_date(year, month, day), _blank(text, match), False
+    match = DAY_FIRST_RE.search(text)
+    if match:
+        day, month, year = int(match.group(1)), MONTHS[match.group(2).lower()], int(match.group(3))
+        return _valid_date(year, month, day), _blank(text, match), False
+    match = NUMERIC_DATE_RE.search(text)
+    if match:
+        first, second, year = map(int, match.groups())
+        # 03/04/2025 could be either order; only settle it when one part is > 12
+        if first <= 12 and second <= 12 and first != second:
+            return None, text, True
+        day, month = (first, second) if first > 12 else (second, first)
+        return _valid_date(year, month, day), _blank(text, match), False
+    match = RELATIVE_DATE_RE.search(text)
+    if match:
+        offset = 1 if match.group(1).lower() == "yesterday" else 0
+        return (today - timedelta(days=offset)).isoformat(), _blank(text, match), False
+    return None, text, False
+
+
+def _extract_name(text: str, loose: bool = False):
+    """(name or None, text with the name blanked)
+
+    Only "patient name is X" / "pt: X" style cues count unless ``loose``;
+    then "patient is X" also does if the words are capitalized.
+    """
+    cue = NAME_CUE_RE.search(text)
+    if not cue:
+        return None, text
+    explicit = not re.match(r"patient\s*is", cue.group(0), re.IGNORECASE)
+    if not explicit and not loose:
+        return None, text
+    words, end = [], cue.end()
+    for match in NAME_WORD_RE.finditer(text, cue.end()):
+        if text[end:match.start()].strip() or len(words) == 4 or match.group(0).lower() in NAME_STOP_WORDS:
+            break
+        words.append(match.group(0))
+        end = match.end()
+    # "patient is diabetic" is not a name: after "patient is" the words must at least be capitalized
+    if not words or (not explicit and (len(words) < 2 or not all(w[0].isupper() for w in words))):
+        return None, text
+    name = " ".join(w if any(c.isupper() for c in w[1:]) else w.capitalize() for w in words)
+    return name, text[:cue.start()] + " " * (end - cue.start()) + text[end:]
+
+
+def service_entry(service: Dict[str, Any]) -> Dict[str, Any]:
+    """Catalog record in the serviceList shape the assistant's JSON is normalized to"""
+    return {
+        "serviceCode": service["code"],
+        "serviceName": service.get("description", ""),
+        "unitPrice": service.get("amount") or 0.0,
+        "code": service["code"],
+        "name": service.get("description", ""),
+        "amount": service.get("amount") or 0.0,
+    }
+
+
+def split_message(message: str, catalog, today: Optional[date] = None,
+                  loose_names: bool = False) -> Tuple[Dict[str, Any], List[str]]:
+    """(bill fields parsed from ``message``, the non-filler words left unexplained)
+
+    Ambiguous or impossible dates and codes missing from the catalog are not
+    parsed, so their parts end up in the leftover words. ``loose_names``
+    also takes capitalized words after "patient is" as the name, which is
+    too unreliable to answer a turn with ("the patient is Diabetic Type")
+    but fine for deciding that it needs no retrieval.
+    """
+    today = today or datetime.now().date()
+    fields: Dict[str, Any] = {}
+    text = message
+
+    service_date, blanked, _ = _extract_date(text, today)
+    if service_date:
+        fields["serviceDate"] = service_date
+        text = blanked
+
+    match = OHIP_RE.search(text)
+    if match:
+        fields["ohipNumber"] = "".join(match.group(1, 2, 3))
+        version = match.group(4) or match.group(5)
+        if version:
+            fields["ohipVersionCode"] = version.upper()
+        text = _blank(text, match)
+
+    services: List[Dict[str, Any]] = []
+    for match in CODE_RE.finditer(text):
+        service = catalog.get(normalize_code(match.group(0)))
+        if not service:
+            continue
+        if all(s["code"] != service["code"] for s in services):
+            services.append(service_entry(service))
+        text = _blank(text, match)
+    if services:
+        fields["serviceList"] = services
+
+    name, text = _extract_name(text, loose_names)
+    if name:
+        fields["patientName"] = name
+
+    return fields, [w for w in WORD_RE.findall(text.lower()) if w not in FILLER_WORDS]
+
+
+def extract_fields(message: str, catalog, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """Bill fields in ``message``, or ``None`` when the turn needs the LLM.
+
+    Returns ``None`` unless at least one field was found and every other word
+    is filler ("patient", "ohip", "date of service", ...).
+    """
+    fields, leftover = split_message(message, catalog, today)
+    if not fields or leftover:
+        return None
+    return fields
+
+
+def merge_fields(bill_info: Dict[str, Any], fields: Dict[str, Any], replace_services: bool = False) -> Dict[str, Any]:
+    """``bill_info`` updated with the non-empty ``fields``.
+
+    New service codes are appended to the existing list, unless
+    ``replace_services``: the assistant's JSON lists the whole bill, so its
+    serviceList replaces the stored one.
+    """
+    merged = dict(bill_info)
+    merged.update({k: v for k, v in fields.items() if k != "serviceList" and v not in (None, "", [])})
+    if fields.get("serviceList"):
+        services = [] if replace_services else list(merged.get("serviceList") or [])
+        known = {s.get("code") for s in services if s.get("code")}
+        services += [s for s in fields["serviceList"] if not s.get("code") or s["code"] not in known]
+        merged["serviceList"] = services
+        merged["optimalService"] = max(services, key=lambda s: float(s.get("amount") or 0))
+    return merged
+
+
+def compose_reply(fields: Dict[str, Any], bill_info: Dict[str, Any]) -> str:
+    """Acknowledge what was extracted and ask for the next missing field"""
+    noted = [f"{label} {fields[field]}" for field, label in FIELD_LABELS.items() if fields.get(field)]
+    noted += [f"{s['code']} ({s['name']}, ${s['amount']})" for s in fields.get("serviceList", [])]
+    reply = "Got it: " + "; ".join(noted) + "."
+    for field, question in NEXT_QUESTIONS.items():
+        if not bill_info.get(field):
+            return f"{reply} {question}"
+    if not bill_info.get("serviceList"):
+        return f"{reply} Which services did you provide?"
+    return f"{reply} Is there anything else to add to this bill?"
+
+
+class FastPathStats:
+    """Counts of chat turns answered locally vs. sent to the LLM"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.llm = 0
+
+    def record(self, local: bool):
+        with self._lock:
+            if local:
+                self.local += 1
+            else:
+                self.llm += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.local + self.llm
+            return {"local_turns": self.local, "llm_turns": self.llm,
+                    "local_rate": round(self.local / total, 3) if total else 0.0}
+
+
+fast_path_stats = FastPathStats()
@@ -0,0 +1,139 @@
+"""In-process BM25 search over the fee schedule.
+
+Indexes category, sub-categories and description of every billing code in the
+fee schedule snapshot; literal codes in a query are matched exactly. BM25 term
+weights are precomputed per posting at build time, so a query is just a sum
+over the postings of its terms and needs no embedding call or network round
+trip.
+"""
+
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.fee_schedule import FeeSchedule, load_fee_schedule, normalize_code
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z]+|[0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "per", "the", "to", "with",
+}
+
+# Field weights: a term in the description counts more than one that only
+# appears in the (long, shared) category names.
+FIELD_WEIGHTS = {
+    "description": 2.0,
+    "sub_category_2": 1.0,
+    "sub_category": 1.0,
+    "category": 0.5,
+}
+CODE_MATCH_BOOST = 1000.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and number tokens minus stopwords ("X-ray" -> ["x", "ray"])"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 impact scores"""
+
+    def __init__(self, schedule: FeeSchedule, k1: float = 1.2, b: float = 0.75):
+        self.schedule = schedule
+        self.k1 = k1
+        self.b = b
+        self.codes: Dict[str, int] = {}
+        self.postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._build()
+
+    def _build(self):
+        doc_terms: List[Counter] = []
+        for i in range(len(self.schedule)):
+            terms: Counter = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(self.schedule.text(field, i)):
+                    terms[token] += weight
+            doc_terms.append(terms)
+            self.codes[self.schedule.code(i)] = i
+
+        n_docs = len(doc_terms)
+        avg_len = sum(sum(t.values()) for t in doc_terms) / max(n_docs, 1)
+        df: Counter = Counter()
+        for terms in doc_terms:
+            df.update(terms.keys())
+
+        postings: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        for doc_id, terms in enumerate(doc_terms):
+            length_norm = self.k1 * (1 - self.b + self.b * sum(terms.values()) / avg_len)
+            for term, tf in terms.items():
+                idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+                ids, weights = postings[term]
+                ids.append(doc_id)
+                weights.append(idf * tf * (self.k1 + 1) / (tf + length_norm))
+        self.postings = dict(postings)
+        logger.info(f"BM25 index built: {n_docs} documents, {len(self.postings)} terms")
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Return (row, score) pairs for the best matching billing codes"""
+        scores: Dict[int, float] = defaultdict(float)
+        words = []
+        # A literal billing code in the query ("A003") should always rank first
+        for word in query.split():
+            row = self.codes.get(normalize_code(word.strip(",.;:()")))
+            if row is not None:
+                scores[row] += CODE_MATCH_BOOST
+            else:
+                words.append(word)
+        for term in set(tokenize(" ".join(words))):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            for doc_id, weight in zip(*posting):
+                scores[doc_id] += weight
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def search_services(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Search and materialize results as service dicts with a ``score``"""
+        results = []
+        for row, score in self.search(query, top_k):
+            service = self.schedule.record(row)
+            service["score"] = round(score, 4)
+            results.append(service)
+        return results
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[Sequence[Dict[str, Any]]], top_k: int = 10,
+                           k: int = 60) -> List[Dict[str, Any]]:
+    """Fuse ranked result lists (dicts with a ``code``) by reciprocal rank.
+
+    The first occurrence of a code provides the fields of the fused result;
+    ``score`` is replaced by the fused RRF score.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    first_seen: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            code = result.get("code")
+            if not code:
+                continue
+            fused[code] += 1.0 / (k + rank + 1)
+            first_seen.setdefault(code, dict(result))
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{**first_seen[code], "score": round(score, 6)} for code, score in ranked]
+
+
+_index: Optional[BM25Index] = None
+
+
+def load_lexical_index() -> BM25Index:
+    """Shared BM25 index over the process-wide fee schedule snapshot"""
+    global _index
+    schedule = load_fee_schedule()
+    if _index is None or _index.schedule is not schedule:
+        _index = BM25Index(schedule)
+    return _index
@@ -0,0 +1,321 @@
+"""In-process vector store, a drop-in stand-in for the Pinecone index.
+
+Vectors are kept L2-normalized in ``embeddings.npy`` (float32, memory-mapped
+on load) with ids and metadata in ``metadata.json``, so cosine similarity is a
+single matrix-vector product. Supports the subset of the Pinecone API the
+backend uses (``upsert``, ``delete``, ``query``, ``describe_index_stats``) and
+the LangChain ``similarity_search`` call made by ``EnhancedRAGService``.
+
+Selected with ``VECTOR_STORE_BACKEND=local``; ``LOCAL_VECTOR_STORE_PATH``
+points at the store directory and ``LOCAL_VECTOR_INDEX=ivf`` switches from
+exact search to an inverted-file (k-means) index probing ``LOCAL_VECTOR_NPROBE``
+clusters.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data", "vector_store"))
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+CENTROIDS_FILE = "ivf_centroids.npy"
+
+
+def vector_store_backend() -> str:
+    """Configured backend: "pinecone" (default) or "local" """
+    return os.getenv("VECTOR_STORE_BACKEND", "pinecone").strip().lower()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate a Pinecone-style metadata filter ($eq/$ne/$in/$nin, $and/$or)"""
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+    return True
+
+
+class LocalVectorStore:
+    """Exact (or IVF) cosine-similarity search over a local embedding matrix"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, embedding=None,
+                 index_type: Optional[str] = None, nprobe: Optional[int] = None):
+        self.path = path
+        self.embedding = embedding
+        self.index_type = (index_type or os.getenv("LOCAL_VECTOR_INDEX", "exact")).lower()
+        self.nprobe = nprobe or int(os.getenv("LOCAL_VECTOR_NPROBE", "8"))
+
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._positions: Dict[str, int] = {}
+        self._pending: List[Tuple[str, List[float], Dict[str, Any]]] = []
+        self._filter_masks: Dict[str, np.ndarray] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._clusters: Optional[List[np.ndarray]] = None
+        self._load()
+
+    # ----- persistence -------------------------------------------------
+
+    def _load(self):
+        embeddings_path = os.path.join(self.path, EMBEDDINGS_FILE)
+        metadata_path = os.path.join(self.path, METADATA_FILE)
+        if not (os.path.exists(embeddings_path) and os.path.exists(metadata_path)):
+            logger.info(f"No local vector store at {self.path}, starting empty")
+            return
+        self.matrix = np.load(embeddings_path, mmap_mode="r")
+        with open(metadata_path, encoding="utf-8") as f:
+            records = json.load(f)
+        self.ids = [r["id"] for r in records]
+        self.metadatas = [r.get("metadata", {}) for r in records]
+        self._positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        centroids_path = os.path.join(self.path, CENTROIDS_FILE)
+        if self.index_type == "ivf" and os.path.exists(centroids_path):
+            self._centroids = np.load(centroids_path)
+        logger.info(f"Loaded local vector store: {len(self.ids)} vectors from {self.path}")
+
+    def save(self):
+        """Write the store to disk (atomically per file)"""
+        self._flush()
+        os.makedirs(self.path, exist_ok=True)
+        self._atomic_write(EMBEDDINGS_FILE, lambda f: np.save(f, np.ascontiguousarray(self.matrix)))
+        records = [{"id": i, "metadata": m} for i, m in zip(self.ids, self.metadatas)]
+        self._atomic_write(METADATA_FILE, lambda f: f.write(json.dumps(records, ensure_ascii=False).encode("utf-8")))
+        if self._centroids is not None:
+            self._atomic_write(CENTROIDS_FILE, lambda f: np.save(f, self._centroids))
+
+    def _atomic_write(self, filename: str, writer):
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{filename}.", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+            os.replace(tmp_path, os.path.join(self.path, filename))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    # ----- writes (Pinecone Index API) ---------------------------------
+
+    def upsert(self, vectors: Sequence[Any], **kwargs) -> Dict[str, int]:
+        """Insert or replace vectors given as dicts or (id, values, metadata) tuples"""
+        for vector in vectors:
+            if isinstance(vector, dict):
+                vector_id, values, metadata = vector["id"], vector["values"], vector.get("metadata", {})
+            else:
+                vector_id, values = vector[0], vector[1]
+                metadata = vector[2] if len(vector) > 2 else {}
+            self._pending.append((vector_id, values, metadata or {}))
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids: Sequence[str] = (), **kwargs):
+        self._flush()
+        drop = {self._positions[i] for i in ids if i in self._positions}
+        if not drop:
+            return
+        keep = [i for i in range(len(self.ids)) if i not in drop]
+        self.matrix = np.asarray(self.matrix)[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self._reindex()
+
+    def _flush(self):
+        """Fold pending upserts into the matrix (copying it out of the mmap)"""
+        if not self._pending:
+            return
+        existing = len(self.ids)
+        matrix = np.array(self.matrix, dtype=np.float32) if existing else None
+        new_rows = []
+        for vector_id, values, metadata in self._pending:
+            row = _normalize(np.asarray(values, dtype=np.float32))
+            position = self._positions.get(vector_id)
+            if position is None:
+                self._positions[vector_id] = len(self.ids)
+                self.ids.append(vector_id)
+                self.metadatas.append(metadata)
+                new_rows.append(row)
+                continue
+            if position < existing:
+                matrix[position] = row
+            else:
+                new_rows[position - existing] = row
+            self.metadatas[position] = metadata
+        self._pending = []
+        if new_rows:
+            stacked = np.vstack(new_rows)
+            matrix = stacked if matrix is None else np.vstack([matrix, stacked])
+        self.matrix = matrix
+        self._reindex()
+
+    def _reindex(self):
+        self._positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        self._filter_masks.clear()
+        self._centroids = None
+        self._clusters = None
+
+    def list(self, prefix: str = "", limit: int = 100, **kwargs):
+        """Pinecone ``Index.list`` equivalent: yields pages of ids starting with ``prefix``"""
+        self._flush()
+        ids = [vector_id for vector_id in self.ids if vector_id.startswith(prefix or "")]
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def describe_index_stats(self, **kwargs):
+        self._flush()
+        return SimpleNamespace(
+            total_vector_count=len(self.ids),
+            dimension=int(self.matrix.shape[1]) if len(self.ids) else 0,
+            index_fullness=0.0,
+            namespaces={},
+        )
+
+    # ----- search ------------------------------------------------------
+
+    def _filter_mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+        key = json.dumps(filter, sort_keys=True)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((_matches_filter(m, filter) for m in self.metadatas),
+                               dtype=bool, count=len(self.metadatas))
+            self._filter_masks[key] = mask
+        return mask
+
+    def _build_ivf(self, iterations: int = 10):
+        """k-means (spherical) over the stored vectors, sqrt(N) clusters"""
+        matrix = np.asarray(self.matrix)
+        n = len(matrix)
+        if self._centroids is None:
+            nlist = max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(0)
+            centroids = matrix[rng.choice(n, size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignments = np.argmax(matrix @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = matrix[assignments == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = _normalize(centroids)
+            self._centroids = centroids
+        assignments = np.argmax(matrix @ self._centroids.T, axis=1)
+        self._clusters = [np.flatnonzero(assignments == c) for c in range(len(self._centroids))]
+
+    def search_by_vector(self, vector: Sequence[float], k: int = 4,
+                         filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """Return (row, cosine score) pairs for the ``k`` nearest stored vectors"""
+        self._flush()
+        if not self.ids or k <= 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        mask = self._filter_mask(filter)
+
+        if self.index_type == "ivf":
+            if self._clusters is None:
+                self._build_ivf()
+            probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            rows = np.concatenate([self._clusters[c] for c in probe])
+            if mask is not None:
+                rows = rows[mask[rows]]
+            scores = self.matrix[rows] @ query
+        else:
+            # Scoring every row and masking afterwards beats gathering the
+            # filtered rows out of the mmap first
+            scores = self.matrix @ query
+            rows = np.flatnonzero(mask) if mask is not None else None
+            if rows is not None:
+                scores = scores[rows]
+        if len(scores) == 0:
+            return []
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i] if rows is not None else i), float(scores[i])) for i in top]
+
+    def query(self, vector: Sequence[float], top_k: int = 10, include_metadata: bool = True,
+              filter: Optional[Dict[str, Any]] = None, **kwargs):
+        """Pinecone ``Index.query`` equivalent"""
+        matches = [
+            SimpleNamespace(id=self.ids[row], score=score,
+                            metadata=self.metadatas[row] if include_metadata else None)
+            for row, score in self.search_by_vector(vector, top_k, filter)
+        ]
+        return SimpleNamespace(matches=matches)
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None, **kwargs):
+        """LangChain ``VectorStore`` equivalent, embedding ``query`` first"""
+        from langchain.schema import Document
+
+        vector = self.embedding.embed_query(query)
+        results = []
+        for row, score in self.search_by_vector(vector, k, filter):
+            metadata = dict(self.metadatas[row])
+            text = metadata.pop("text", "")
+            results.append((Document(page_content=text, metadata=metadata), score))
+        return results
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+
+_stores: Dict[str, LocalVectorStore] = {}
+
+
+def load_local_vector_store(path: Optional[str] = None, embedding=None, reload: bool = False) -> LocalVectorStore:
+    """Process-wide store for ``path`` (default ``LOCAL_VECTOR_STORE_PATH``).
+
+    ``reload=True`` re-reads the store from disk, e.g. after a new upload.
+    """
+    path = path or os.getenv("LOCAL_VECTOR_STORE_PATH", DEFAULT_STORE_PATH)
+    store = _stores.get(path)
+    if reload and store is not None:
+        embedding = embedding or store.embedding
+        store = None
+    if store is None:
+        store = _stores[path] = LocalVectorStore(path, embedding=embedding)
+    elif embedding is not None and store.embedding is None:
+        store.embedding = embedding
+    return store
+
+
+def open_vector_index(pinecone_api_key: Optional[str] = None, index_name: Optional[str] = None):
+    """Index handle for the configured backend (local store or Pinecone ``Index``)"""
+    if vector_store_backend() == "local":
+        return load_local_vector_store()
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=pinecone_api_key or os.getenv("PINECONE_API_KEY"))
+    return pc.Index(index_name or os.getenv("PINECONE_INDEX_NAME", "medical-bills"))
@@ -0,0 +1,168 @@
+"""Offline stand-ins for the OpenAI API and a remote vector index.
+
+``FakeEmbeddingsClient`` mimics ``OpenAI().embeddings.create`` with
+deterministic hash-seeded vectors, and ``LatencyIndex`` wraps any index
+(normally a ``LocalVectorStore``) to add per-call latency. Together they let
+the upload pipeline be exercised and benchmarked without network access.
+``FakeChatClient`` plays back a canned reply through the Assistants and
+Chat Completions surfaces used by ``services.chat_backend``.
+"""
+
+import hashlib
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator, List, Sequence, Union
+
+import numpy as np
+
+FAKE_EMBEDDING_MODEL = "fake-embedding"
+
+
+class _FakeEmbeddingsEndpoint:
+    def __init__(self, client: "FakeEmbeddingsClient"):
+        self._client = client
+
+    def create(self, model: str, input: Union[str, Sequence[str]], **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        self._client._record(texts)
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        data = [
+            SimpleNamespace(index=i, embedding=self._client.vector(text), object="embedding")
+            for i, text in enumerate(texts)
+        ]
+        return SimpleNamespace(data=data, model=model)
+
+
+class FakeEmbeddingsClient:
+    """Drop-in for the ``embeddings`` part of ``openai.OpenAI``"""
+
+    def __init__(self, dimension: int = 1536, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self.requests = 0
+        self.texts_embedded = 0
+        self._lock = threading.Lock()
+        self.embeddings = _FakeEmbeddingsEndpoint(self)
+
+    def _record(self, texts: List[str]):
+        with self._lock:
+            self.requests += 1
+            self.texts_embedded += len(texts)
+
+    def vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+class LatencyIndex:
+    """Wrap an index and sleep ``latency`` seconds per write/query call"""
+
+    def __init__(self, index, latency: float = 0.0):
+        self.index = index
+        self.latency = latency
+        self.calls = 0
+
+    def _delay(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, *args, **kwargs):
+        self._delay()
+        return self.index.upsert(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._delay()
+        return self.index.delete(*args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        self._delay()
+        return self.index.query(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+class _FakeRunStream:
+    def __init__(self, client: "FakeChatClient"):
+        self._client = client
+        self.current_run = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_deltas(self) -> Iterator[str]:
+        self._client._round_trip()
+        yield from self._client._tokens()
+        self.current_run = SimpleNamespace(status="completed")
+
+
+class FakeChatClient:
+    """Drop-in for the ``beta.threads`` and ``chat.completions`` parts of ``openai.OpenAI``.
+
+    Every request costs ``round_trip`` seconds and the reply is generated at
+    ``token_latency`` seconds per whitespace-separated token. A polled run
+    reports ``completed`` once the whole reply would have been generated.
+    """
+
+    def __init__(self, reply: str, round_trip: float = 0.1, token_latency: float = 0.01):
+        self.reply = reply
+        self.round_trip = round_trip
+        self.token_latency = token_latency
+        self.requests = 0
+        self._runs = {}
+        self._lock = threading.Lock()
+        threads = SimpleNamespace(
+            create=self._create_thread,
+            create_and_run_stream=lambda **kwargs: _FakeRunStream(self),
+            runs=SimpleNamespace(create=self._create_run, retrieve=self._retrieve_run),
+            messages=SimpleNamespace(list=self._list_messages),
+        )
+        self.beta = SimpleNamespace(threads=threads)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def _round_trip(self):
+        with self._lock:
+            self.requests += 1
+        if self.round_trip:
+            time.sleep(self.round_trip)
+
+    def _tokens(self) -> Iterator[str]:
+        for i, token in enumerate(self.reply.split(" ")):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield (" " if i else "") + token
+
+    def _create_thread(self, messages=None, **kwargs):
+        self._round_trip()
+        return SimpleNamespace(id=f"thread_{self.requests}")
+
+    def _create_run(self, thread_id: str, assistant_id: str = None, **kwargs):
+        self._round_trip()
+        run_id = f"run_{self.requests}"
+        self._runs[run_id] = time.monotonic() + self.token_latency * len(self.reply.split(" "))
+        return SimpleNamespace(id=run_id, status="queued")
+
+    def _retrieve_run(self, thread_id: str, run_id: str, **kwargs):
+        self._round_trip()
+        done = time.monotonic() >= self._runs[run_id]
+        return SimpleNamespace(id=run_id, status="completed" if done else "in_progress")
+
+    def _list_messages(self, thread_id: str, **kwargs):
+        self._round_trip()
+        text = SimpleNamespace(value=self.reply)
+        return SimpleNamespace(data=[SimpleNamespace(role="assistant", content=[SimpleNamespace(text=text)])])
+
+    def _create_completion(self, model: str, messages, stream: bool = False, **kwargs):
+        self._round_trip()
+        return (
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+            for token in self._tokens()
+        )
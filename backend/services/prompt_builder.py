@@ -0,0 +1,123 @@
+"""Token-budgeted prompt assembly for billing chat turns.
+
+The billing instructions are constant and built once. Each turn adds, in
+priority order:
+
+1. the bill fields collected so far, as compact JSON, so they no longer
+   depend on the raw transcript;
+2. the RAG context, capped at ``CHAT_CONTEXT_TOKENS``;
+3. as many recent messages as fit in ``CHAT_PROMPT_TOKENS``;
+4. a one-line summary of each older user message that was dropped, here
+   or earlier when the session trimmed its stored history.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.chat_sessions import estimate_tokens
+
+PROMPT_TOKENS = int(os.getenv("CHAT_PROMPT_TOKENS", "3000"))
+CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "800"))
+SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "200"))
+SUMMARY_LINE_CHARS = 120
+
+BILLING_INSTRUCTIONS = """You are a helpful medical billing assistant.
+
+If this is the user's first message (like "hi" or a greeting), respond warmly and ask how you can help with their billing needs.
+
+When the user describes medical services, use the context below to identify ALL mentioned services with their specific codes and fees. Search for each service separately (e.g., "general assessment" AND "chest x-ray").
+
+Be conversational and helpful - ask for one piece of information at a time if needed.
+
+When you have enough information, provide a JSON response with ALL services found from your knowledge base:
+{
+  "patientName": "name",
+  "serviceDate": "YYYY-MM-DD",
+  "ohipNumber": "number",
+  "services": [
+    {"serviceName": "service name from database", "serviceCode": "code from database", "unitPrice": actual_price_from_database}
+  ]
+}"""
+
+STATE_FIELDS = ("patientName", "ohipNumber", "ohipVersionCode", "serviceDate", "serviceType", "diagnosisCode", "billingType")
+
+
+def collected_state(bill_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compact view of the collected bill: scalar fields plus code/name/amount per service"""
+    bill_info = bill_info or {}
+    state = {field: bill_info[field] for field in STATE_FIELDS if bill_info.get(field)}
+    services = bill_info.get("serviceList") or bill_info.get("services") or []
+    if services:
+        state["services"] = [
+            {key: s.get(key) for key in ("code", "name", "amount") if s.get(key) not in (None, "")}
+            for s in services if isinstance(s, dict)
+        ]
+    return state
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens * 4)
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " ..."
+
+
+def build_prompt(user_message: str, history: Optional[List[Dict[str, str]]] = None,
+                 bill_info: Optional[Dict[str, Any]] = None, context: str = "",
+                 max_tokens: int = PROMPT_TOKENS,
+                 earlier: Optional[List[str]] = None) -> Tuple[str, List[Dict[str, str]], Dict[str, int]]:
+    """(prompt, history to replay, token accounting) for one turn within ``max_tokens``.
+
+    ``earlier`` holds user messages older than ``history`` (already trimmed
+    off the session); they are summarized together with what gets dropped here.
+    """
+    history = [m for m in history or [] if m.get("role") in ("user", "assistant") and m.get("content")]
+    sections = [BILLING_INSTRUCTIONS]
+    state = collected_state(bill_info)
+    if state:
+        sections.append("Already collected (do not ask for these again unless the user corrects them):\n"
+                        + json.dumps(state, separators=(",", ":")))
+
+    used = sum(estimate_tokens(section) for section in sections) + estimate_tokens(user_message)
+    context = _truncate(context, min(CONTEXT_TOKENS, max(0, max_tokens - used)))
+    used += estimate_tokens(context)
+
+    # Newest messages first, keeping room for the summary of what gets dropped
+    history_budget = max_tokens - used - SUMMARY_TOKENS
+    kept: List[Dict[str, str]] = []
+    for message in reversed(history):
+        cost = estimate_tokens(message["content"])
+        if cost > history_budget:
+            break
+        kept.append(message)
+        history_budget -= cost
+    kept.reverse()
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    dropped = history[:len(history) - len(kept)]
+
+    dropped_user = [{"role": "user", "content": text} for text in earlier or []]
+    dropped_user += [m for m in dropped if m["role"] == "user"]
+    if dropped_user:
+        lines, summary_budget = [], SUMMARY_TOKENS
+        for message in reversed(dropped_user):
+            line = "- " + _truncate(" ".join(message["content"].split()), SUMMARY_LINE_CHARS // 4)
+            if estimate_tokens(line) > summary_budget:
+                break
+            lines.append(line)
+            summary_budget -= estimate_tokens(line)
+        # Only user messages are summarized, so only they count as omitted
+        omitted = len(dropped_user) - len(lines)
+        summary = "Earlier in this conversation the user said:\n" + "\n".join(reversed(lines))
+        if omitted:
+            summary += f"\n({omitted} older user messages omitted)"
+        sections.append(summary)
+        used += estimate_tokens(summary)
+
+    sections.append(f"Context:\n{context}")
+    prompt = "\n\n".join(sections)
+    stats = {
+        "prompt_tokens": used + sum(estimate_tokens(m["content"]) for m in kept),
+        "history_kept": len(kept),
+        "history_dropped": len(dropped),
+    }
+    return prompt, kept, stats
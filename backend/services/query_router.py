@@ -0,0 +1,58 @@
+"""Route each chat turn to the cheapest retrieval that can serve it.
+
+- ``none``: greetings, acknowledgements and turns that only carry bill
+  fields (name, OHIP number, date) need no context at all;
+- ``code_lookup``: turns that only name billing codes get their context from
+  the fee schedule catalog, without an embedding call or a vector search;
+- ``semantic``: anything with free text goes to the vector search as before
+  (with the catalog entries of any codes it also names).
+"""
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+from services.field_extraction import split_message
+
+ROUTE_NONE = "none"
+ROUTE_CODE_LOOKUP = "code_lookup"
+ROUTE_SEMANTIC = "semantic"
+ROUTES = (ROUTE_NONE, ROUTE_CODE_LOOKUP, ROUTE_SEMANTIC)
+
+# Conversational words that never describe a service
+CHITCHAT_WORDS = {
+    "afternoon", "bye", "correct", "done", "evening", "good", "great", "hey", "morning", "no", "ok", "okay",
+    "perfect", "right", "sure", "thank", "thx", "ty", "you", "yep", "yeah",
+}
+
+
+def route_query(message: str, catalog) -> Tuple[str, List[Dict[str, Any]]]:
+    """(route, catalog services for the codes named in ``message``)"""
+    fields, leftover = split_message(message, catalog, loose_names=True)
+    services = fields.get("serviceList", [])
+    if any(word not in CHITCHAT_WORDS for word in leftover):
+        return ROUTE_SEMANTIC, services
+    return (ROUTE_CODE_LOOKUP if services else ROUTE_NONE), services
+
+
+def code_context(services: List[Dict[str, Any]]) -> str:
+    """Prompt context for catalog services, in the same wording as the semantic lookup"""
+    return ". ".join(f"Service found: {s['name']} (code: {s['code']}, price: ${s['amount']})" for s in services)
+
+
+class RouteStats:
+    """Number of chat turns sent down each route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(ROUTES, 0)
+
+    def record(self, route: str):
+        with self._lock:
+            self._counts[route] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+route_stats = RouteStats()
@@ -0,0 +1,97 @@
+"""Indexed lookups over the fee schedule snapshot.
+
+``ServiceCatalog`` keeps a code -> row hash index for exact and batch lookups,
+the sorted code list for prefix/range queries (the snapshot is already sorted
+by code, so ``bisect`` works directly) and a category -> rows index. Rows are
+materialized from the mmap'd snapshot only when they are returned.
+"""
+
+import bisect
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.fee_schedule import FeeSchedule, load_fee_schedule, normalize_code
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceCatalog:
+    """Hash, prefix and category index over a ``FeeSchedule``"""
+
+    def __init__(self, schedule: FeeSchedule):
+        self.schedule = schedule
+        self.codes: List[str] = [schedule.code(i) for i in range(len(schedule))]
+        self._rows: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self._categories: Dict[str, List[int]] = defaultdict(list)
+        for i in range(len(schedule)):
+            for field in ("category", "sub_category"):
+                value = schedule.text(field, i).lower()
+                if value:
+                    rows = self._categories[value]
+                    if not rows or rows[-1] != i:
+                        rows.append(i)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return self._row(code) is not None
+
+    def _row(self, code: str) -> Optional[int]:
+        row = self._rows.get(code)
+        if row is None and code:
+            row = self._rows.get(normalize_code(code))
+        return row
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Exact lookup; accepts unnormalized codes such as "a003" or "F 005" """
+        row = self._row(code)
+        return self.schedule.record(row) if row is not None else None
+
+    def get_many(self, codes: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Batch lookup, keyed by the codes as given (None for unknown codes)"""
+        return {code: self.get(code) for code in codes}
+
+    def _slice(self, start: int, end: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self.schedule.record(i) for i in range(start, end)]
+
+    def with_prefix(self, prefix: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All services whose code starts with ``prefix`` (e.g. "A0" for A0xx)"""
+        prefix = "".join(prefix.split()).upper()
+        # Trailing wildcards ("A0XX", "A0*") only make sense after the letter
+        prefix = prefix[:1] + prefix[1:].rstrip("X*")
+        start = bisect.bisect_left(self.codes, prefix)
+        end = bisect.bisect_left(self.codes, prefix + "\uffff")
+        return self._slice(start, end, limit)
+
+    def in_range(self, first: str, last: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All services with ``first <= code <= last`` (inclusive)"""
+        start = bisect.bisect_left(self.codes, first.upper())
+        end = bisect.bisect_right(self.codes, last.upper())
+        return self._slice(start, end, limit)
+
+    def in_category(self, category: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All services whose category or sub-category matches (case-insensitive)"""
+        rows = self._categories.get(category.strip().lower(), [])
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.schedule.record(i) for i in rows]
+
+    def categories(self) -> List[str]:
+        return sorted(self._categories)
+
+
+_catalog: Optional[ServiceCatalog] = None
+
+
+def load_service_catalog() -> ServiceCatalog:
+    """Shared catalog over the process-wide fee schedule snapshot"""
+    global _catalog
+    schedule = load_fee_schedule()
+    if _catalog is None or _catalog.schedule is not schedule:
+        _catalog = ServiceCatalog(schedule)
+        logger.info(f"Indexed {len(_catalog)} billing codes")
+    return _catalog
@@ -2,27 +2,23 @@ class ServiceCombinationService:
     """Service for finding optimal medical service combinations"""
     
     def __init__(self):
-        self.services = []
-        # Load services from data files
-        self._load_services()
+        # The catalog is loaded on first use (or by the startup warm-up)
+        self._catalog = None
     
     def _load_services(self):
-        """Load services from CSV files"""
-        import os
-        import csv
+        """Load services from the shared fee schedule snapshot"""
+        from services.service_catalog import load_service_catalog
         
-        data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
-        for filename in os.listdir(data_dir):
-            if filename.startswith("dataset_schedule_of_benefits") and filename.endswith(".csv"):
-                with open(os.path.join(data_dir, filename), encoding="utf-8-sig") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row.get("Billing Code"):
-                            self.services.append({
-                                "code": row.get("Billing Code"),
-                                "description": row.get("Description"),
-                                "amount": row.get("Charge $")
-                            })
+        self._catalog = load_service_catalog()
+        return self._catalog
+    
+    @property
+    def catalog(self):
+        return self._catalog or self._load_services()
+    
+    @property
+    def services(self):
+        return self.catalog.schedule
     
     def find_optimal_services(self, description: str, max_services: int = 5):
         """Find optimal service combinations based on description"""
@@ -52,11 +48,8 @@ class ServiceCombinationService:
     def compare_service_options(self, service_codes: list):
         """Compare multiple service options"""
         try:
-            results = []
-            for code in service_codes:
-                service = next((s for s in self.services if s["code"] == code), None)
-                if service:
-                    results.append(service)
+            found = self.catalog.get_many(service_codes)
+            results = [found[code] for code in service_codes if found[code]]
             
             return {
                 "services": results,
@@ -68,7 +61,7 @@ class ServiceCombinationService:
     def get_service_details(self, service_code: str):
         """Get detailed information about a specific service"""
         try:
-            service = next((s for s in self.services if s["code"] == service_code), None)
+            service = self.catalog.get(service_code)
             if service:
                 return {
                     "service": service,
@@ -79,6 +72,25 @@ class ServiceCombinationService:
         except Exception as e:
             return {"error": str(e)}
     
+    def list_services(self, prefix: str = "", category: str = "", start: str = "", end: str = "", limit: int = 100):
+        """List services by code prefix, code range or category"""
+        try:
+            if start or end:
+                results = self.catalog.in_range(start or "A000", end or "Z999Z", limit)
+            elif category:
+                results = self.catalog.in_category(category, limit)
+            else:
+                results = self.catalog.with_prefix(prefix, limit)
+            return {"services": results, "count": len(results)}
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def search_services(self, query: str, limit: int = 10):
+        """Rank services for a free-text query with the local BM25 index"""
+        from services.lexical_search import load_lexical_index
+        
+        return load_lexical_index().search_services(query, top_k=limit)
+    
     def suggest_alternatives(self, service_code: str, reason: str = ""):
         """Suggest alternative services for a given service code"""
         try:
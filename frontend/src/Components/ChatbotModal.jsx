@@ -41,6 +41,8 @@ const ChatbotModal = () => {
   const [isRealtime, setIsRealtime] = useState(false);
   const [context, setContext] = useState({});
   const [missingFields, setMissingFields] = useState([]);
+  // Server-side chat session: after the first reply only the new message is sent
+  const sessionIdRef = useRef(null);
   const [realtimeStatus, setRealtimeStatus] = useState('');
   const [wsRef, setWsRef] = useState(null);
   const [audioContext, setAudioContext] = useState(null);
@@ -551,18 +553,27 @@ const ChatbotModal = () => {
     const systemPrompt = messages.length <= 1
       ? "You are a friendly and professional medical billing assistant. Always greet the user at the start, then help with billing questions."
       : undefined;
-    const payload = {
+    const postChat = (payload) => fetch(`${import.meta.env.VITE_PYTHON_API}/chat`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload),
+    });
+    const fullPayload = {
       message: userInput,
       chat_history,
+      ...(sessionIdRef.current ? { session_id: sessionIdRef.current } : {}),
       ...(systemPrompt ? { system_prompt: systemPrompt } : {})
     };
     try {
-      const res = await fetch(`${import.meta.env.VITE_PYTHON_API}/chat`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(payload),
-      });
+      let res = await postChat(sessionIdRef.current
+        ? { message: userInput, session_id: sessionIdRef.current }
+        : fullPayload);
+      if (res.status === 409) {
+        // Session expired on the server: resend the history to re-seed it
+        res = await postChat(fullPayload);
+      }
       const data = await res.json();
+      if (data.sessionId) sessionIdRef.current = data.sessionId;
       const aiMsg = { role: 'ai', content: extractNaturalReply(data.reply), id: genMsgId() };
       setMessages(prev => [...prev, aiMsg]);
       setContext(data.billInfo || {});